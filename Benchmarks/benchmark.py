@@ -0,0 +1,234 @@
+"""
+     CyberFlood Python Client - Benchmark Suite
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Measures the client-side cost of the CyberFlood Python client. Everything runs locally, against
+    the mock controller (CyberFloodMock.py) and a generated OpenAPI spec, so the results only depend
+    on the client and the machine.
+
+    Benchmarks:
+        init_download_spec  - CyberFlood.__init__, downloading and parsing the OpenAPI.yaml file.
+        init_cached_spec    - CyberFlood.__init__, using the cached perform commands.
+        generate_classes    - _generate_classes() for the whole spec.
+        perform_dispatch    - perform() minus exec(), i.e. the cost of the perform command layer.
+        exec_roundtrip      - exec() against the mock controller.
+        add_filters         - _add_filters() with several multi-key filters.
+        deepupdate          - deepupdate() of a large test configuration.
+        decode_result       - Decoding a large test run result response.
+        poll_loop           - Start a test and poll "getTestRun" until it completes.
+
+    The results are saved as JSON (by default in Benchmarks/results), so that different versions of
+    the client can be compared:
+        python benchmark.py
+        python benchmark.py --compare results/1.25.0_2026-10-19-10-00-00.json
+
+    See also logging_decorator_benchmark.py.
+"""
+
+import os
+import sys
+import json
+import time
+import timeit
+import argparse
+import datetime
+import tempfile
+
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import CyberFlood
+import CyberFloodMock
+
+
+BENCHMARK_VERSION = "0.0.0-benchmark"
+
+
+# =============================================================================
+# Test data
+# =============================================================================
+def make_spec(resources=150):
+    """Generate an OpenAPI spec with list/create/get/update/delete commands for each resource,
+    plus the test and test run commands. The real spec has a few hundred commands.
+    """
+    paths = {}
+    for index in range(resources):
+        tag = "Resource %d" % index
+        name = "Resource%d" % index
+        base = "/resources/r%d" % index
+        parameter = [{"in": "path", "name": "resourceId", "required": True, "schema": {"type": "string"}}]
+        paths[base] = {"get": {"tags": [tag], "operationId": "list" + name + "s", "parameters": [{"in": "query", "name": "filter"}]},
+                       "post": {"tags": [tag], "operationId": "create" + name}}
+        paths[base + "/{resourceId}"] = {"get": {"tags": [tag], "operationId": "get" + name, "parameters": parameter},
+                                         "put": {"tags": [tag], "operationId": "update" + name, "parameters": parameter},
+                                         "delete": {"tags": [tag], "operationId": "delete" + name, "parameters": parameter}}
+
+    test = [{"in": "path", "name": "testId"}]
+    run = [{"in": "path", "name": "testRunId"}]
+    paths.update({
+        "/tests": {"get": {"tags": ["Tests"], "operationId": "listTests"}},
+        "/tests/emix": {"get": {"tags": ["EMix Tests"], "operationId": "listEmixTests"},
+                        "post": {"tags": ["EMix Tests"], "operationId": "createEmixTest"}},
+        "/tests/emix/{testId}": {"get": {"tags": ["EMix Tests"], "operationId": "getEmixTest", "parameters": test},
+                                 "put": {"tags": ["EMix Tests"], "operationId": "updateEmixTest", "parameters": test}},
+        "/tests/{testId}/start": {"put": {"tags": ["Tests"], "operationId": "startTest", "parameters": test}},
+        "/test_runs/{testRunId}": {"get": {"tags": ["Test Runs"], "operationId": "getTestRun", "parameters": run}},
+        "/test_runs/{testRunId}/results": {"get": {"tags": ["Test Runs"], "operationId": "listTestRunResults", "parameters": run}},
+    })
+
+    return {"openapi": "3.0.0", "info": {"title": "CyberFlood (benchmark)", "version": BENCHMARK_VERSION}, "paths": paths}
+
+
+def make_config(subnets=1000):
+    # Roughly the shape of a large EMix test configuration.
+    config = {"config": {"subnets": {"client": [], "server": []}, "trafficMix": {"mixer": []}, "loadSpecification": {"duration": 180}}}
+    for index in range(subnets):
+        subnet = {"id": "%032x" % index, "name": "subnet_" + str(index),
+                  "addressing": {"address": "10.1.1.1", "count": 100, "netmask": 24, "type": "custom"},
+                  "vlans": [{"id": index % 4094, "priority": 0}]}
+        config["config"]["subnets"]["client"].append(subnet)
+        config["config"]["subnets"]["server"].append(dict(subnet))
+
+    return config
+
+
+def make_result(series=40, points=1000):
+    raw = {"Summary": {"Average CPS": 12859.9, "Average TPS": 4827.8, "Average Throughput": 2881421.2, "Completion": 100}}
+    for section in ("Connections", "Transactions", "Throughput", "Sessions"):
+        raw[section] = {"Series %d" % index: [[t * 4, (t * 7919 + index) % 6000] for t in range(points)] for index in range(series // 4)}
+
+    return {"id": "result", "testRunId": "run", "raw": raw}
+
+
+def json_response(value):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "application/json"
+    response._content = json.dumps(value).encode("utf-8")
+    response._content_consumed = True
+
+    return response
+
+
+# =============================================================================
+# Benchmarks
+# =============================================================================
+def measure(function, repeat=5, number=1):
+    """Return the best and the mean time (in seconds) of one call to function.
+    """
+    times = [t / number for t in timeit.repeat(function, repeat=repeat, number=number)]
+
+    return {"best": min(times), "mean": sum(times) / len(times), "repeat": repeat, "number": number}
+
+
+def run_benchmarks(spec, quick=False):
+    repeat = 3 if quick else 5
+    results = {}
+
+    def client(mock, use_yaml_cache):
+        return CyberFlood.CyberFlood("benchmark@localhost", "benchmark", mock.address, use_yaml_cache=use_yaml_cache,
+                                     log_level="WARNING", log_to_file=False)
+
+    cache_filename = os.path.join(os.path.dirname(os.path.abspath(CyberFlood.__file__)),
+                                  "perform_commands_cache_" + BENCHMARK_VERSION + ".json")
+    workdir = tempfile.mkdtemp(prefix="cf_benchmark_")
+    olddir = os.getcwd()
+    os.chdir(workdir)
+
+    mock = CyberFloodMock.MockController(spec, version=BENCHMARK_VERSION, run_duration=1, waiting_duration=0.5)
+    mock.start()
+    try:
+        results["init_download_spec"] = measure(lambda: client(mock, False), repeat)
+
+        client(mock, True)
+        results["init_cached_spec"] = measure(lambda: client(mock, True), repeat)
+
+        cf = client(mock, False)
+        results["generate_classes"] = measure(lambda: cf._generate_classes(spec), repeat)
+
+        # The dispatch overhead is measured with exec() replaced by a function that does nothing.
+        number = 2000 if quick else 20000
+        exec_function = cf.exec
+        cf.exec = lambda *args, **kwargs: None
+        perform = measure(lambda: cf.perform("getEmixTest", testId="0123456789abcdef"), repeat, number)
+        direct = measure(lambda: cf.exec("get", "/tests/emix/0123456789abcdef"), repeat, number)
+        cf.exec = exec_function
+        results["perform_dispatch"] = {key: perform[key] - direct[key] if key in ("best", "mean") else perform[key] for key in perform}
+
+        results["exec_roundtrip"] = measure(lambda: cf.exec("get", "/tests"), repeat, 20 if quick else 200)
+
+        filters = {"name": "Matt Test", "duration-lt": 500, "duration-gt": 10, "type": "emix", "createdAt-gte": "2022-01-01"}
+        results["add_filters"] = measure(lambda: cf._add_filters(filters), repeat, number)
+
+        config = make_config()
+        results["deepupdate"] = measure(lambda: CyberFlood.deepupdate({}, config), repeat, 5)
+
+        response = json_response(make_result())
+        results["decode_result"] = measure(lambda: cf._decode(response, cf.controller_address + "/results"), repeat)
+
+        test = cf.perform("createEmixTest", name="Benchmark", config=make_config(10)["config"])
+
+        def poll_loop():
+            testrun = cf.perform("startTest", testId=test["id"])
+            while testrun["status"] in ("waiting", "running"):
+                time.sleep(0.05)
+                testrun = cf.perform("getTestRun", testRunId=testrun["id"])
+
+            return cf.perform("listTestRunResults", testRunId=testrun["id"])
+
+        results["poll_loop"] = measure(poll_loop, 1 if quick else 3)
+    finally:
+        mock.stop()
+        os.chdir(olddir)
+        if os.path.isfile(cache_filename):
+            os.remove(cache_filename)
+
+    return results
+
+
+def print_results(results, previous=None):
+    print("%-20s %14s %14s %10s" % ("Benchmark", "Best", "Mean", "Change"))
+    for name, result in results.items():
+        change = ""
+        if previous and name in previous.get("results", {}):
+            before = previous["results"][name]["best"]
+            if before > 0:
+                change = "%+.1f%%" % ((result["best"] - before) / before * 100)
+
+        print("%-20s %12.3fms %12.3fms %10s" % (name, result["best"] * 1000, result["mean"] * 1000, change))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CyberFlood Python client.")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "results"),
+                        help="The directory for the results file.")
+    parser.add_argument("--compare", help="A previous results file to compare with.")
+    parser.add_argument("--resources", type=int, default=150, help="The number of resources in the generated spec.")
+    parser.add_argument("--quick", action="store_true", help="Fewer repetitions.")
+    args = parser.parse_args(argv)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+
+    results = run_benchmarks(make_spec(args.resources), quick=args.quick)
+
+    print_results(results, previous)
+
+    if not os.path.exists(args.output):
+        os.makedirs(args.output)
+
+    filename = os.path.join(args.output, CyberFlood.__version__ + "_" + datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S") + ".json")
+    with open(filename, "w") as f:
+        json.dump({"client_version": CyberFlood.__version__,
+                   "python": sys.version,
+                   "platform": sys.platform,
+                   "created": datetime.datetime.now().isoformat(),
+                   "results": results}, f, indent=2)
+
+    print("Results saved to " + filename)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+     CyberFlood Python Client - logging_decorator Benchmark
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Measures the per-call overhead that the logging_decorator adds to a function that receives
+    and returns a large test configuration, at the INFO and DEBUG log levels.
+
+    The "legacy" decorator is a copy of the original implementation, which always converted the
+    arguments and the return value to strings.
+
+    Usage:
+        python logging_decorator_benchmark.py
+"""
+
+import os
+import sys
+import timeit
+import logging
+import functools
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import CyberFlood
+
+
+def legacy_logging_decorator(func):
+    """The logging_decorator from version 1.20.0 and earlier.
+    """
+    @functools.wraps(func)
+    def wrapper_decorator(*args, **kwargs):
+        CyberFlood.LOGGER.debug("ENTER=%s args=%s kwargs=%s", str(func), str(args),
+                                str(kwargs))
+
+        value = func(*args, **kwargs)
+
+        CyberFlood.LOGGER.debug("LEAVE=%s returns=%s", str(func), str(value))
+
+        return value
+    return wrapper_decorator
+
+
+def make_config(subnets=2000):
+    # Roughly the shape of a large EMix test configuration.
+    config = {"name": "Benchmark", "config": {"subnets": {"client": [], "server": []}, "trafficMix": {"mixer": []}}}
+    for index in range(subnets):
+        subnet = {"id": "%032x" % index, "name": "subnet_" + str(index),
+                  "addressing": {"address": "10.1.1.1", "count": 100, "netmask": 24, "type": "custom"},
+                  "vlans": [{"id": index % 4094, "priority": 0}]}
+        config["config"]["subnets"]["client"].append(subnet)
+        config["config"]["subnets"]["server"].append(subnet)
+
+    return config
+
+
+def per_call_microseconds(func, config, number):
+    return timeit.timeit(lambda: func(config, testId="abc"), number=number) / number * 1e6
+
+
+def main():
+    config = make_config()
+
+    def command(*args, **kwargs):
+        return args[0]
+
+    # The log output isn't interesting here, only the cost of producing it.
+    CyberFlood.LOGGER.addHandler(logging.NullHandler())
+    CyberFlood.LOGGER.propagate = False
+
+    baseline = per_call_microseconds(command, config, 2000)
+    print("Undecorated call:                %10.2f us" % baseline)
+
+    for level in ("INFO", "DEBUG"):
+        CyberFlood.LOGGER.setLevel(level)
+        number = 2000 if level == "INFO" else 20
+
+        legacy = per_call_microseconds(legacy_logging_decorator(command), config, number) - baseline
+        current = per_call_microseconds(CyberFlood.logging_decorator(command), config, number) - baseline
+
+        print("%-5s legacy decorator overhead:   %10.2f us" % (level, legacy))
+        print("%-5s current decorator overhead:  %10.2f us" % (level, current))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 # The next line is intentionally blank.
 
 __author__ = "Matthew Jefferson"
-__version__ = "1.4.3"
+__version__ = "1.28.0"
 
 # The previous line is intentionally blank.
 
@@ -63,6 +63,192 @@ __version__ = "1.4.3"
             cf.perform("getTestRunResult", testRunId=testrun["id"], testRunResultsId=testrunresults["id"])
 
     Modification History:
+    1.28.0 : 10/19/2026 - Matthew Jefferson
+        -Added the CircuitBreaker class. After a number of consecutive failures (connection errors, timeouts
+         or 5xx responses), requests fail immediately with a CircuitOpenError instead of waiting for the
+         controller (e.g. while it reboots). After reset_timeout seconds, a probe request is allowed through;
+         the circuit closes again when it succeeds.
+        -Added the timeout argument when initializing the CyberFlood class. It is used for every request.
+         e.g. cf = CyberFlood(..., timeout=30, circuit_breaker=CyberFlood.CircuitBreaker(failure_threshold=5, reset_timeout=30))
+              if cf.health()["available"]:
+                  ...
+
+    1.27.0 : 10/19/2026 - Matthew Jefferson
+        -Added the RequestGovernor class, which limits the request rate (token bucket) and the number of requests
+         in flight for a controller. Limits may also be set per object type (command tag).
+         e.g. cf.limit_requests(rate=20, max_in_flight=8)
+              cf.limit_requests(rate=2, tag="Tests")
+         The limits are enforced by exec(), so they apply to every thread using the CyberFlood object.
+         The time spent waiting is included in the metrics ("throttled_seconds").
+
+    1.26.0 : 10/19/2026 - Matthew Jefferson
+        -Added the profile method. It returns a context manager that profiles the client (with cProfile) and
+         times each request: encode, connect (DNS and TCP), TLS, time to first byte, download and decode.
+         e.g. with cf.profile() as p:
+                  run_my_setup()
+              print(p.report())
+         The report shows the time per command, and whether the time was spent in the client or waiting
+         for the controller.
+
+    1.25.0 : 10/19/2026 - Matthew Jefferson
+        -The controller_address may now include the scheme (e.g. "http://127.0.0.1:8080"). HTTPS is still used
+         when the scheme is not specified. This is mostly useful with the mock controller (CyberFloodMock.py).
+
+    1.24.0 : 10/19/2026 - Matthew Jefferson
+        -Added the cassette argument when initializing the CyberFlood class. A Cassette records every request
+         and response (including file attachments) to a file, or replays them without contacting a controller.
+         e.g. cf = CyberFlood(..., cassette=Cassette("workflow.cassette", mode="record"))
+              cf = CyberFlood(..., cassette=Cassette("workflow.cassette", mode="replay", latency="recorded"))
+         When replaying, the latency argument can be None (no delay), "recorded" (the original response
+         time), or a fixed number of seconds.
+
+    1.23.0 : 10/19/2026 - Matthew Jefferson
+        -Added the tracer argument when initializing the CyberFlood class. When specified, spans are recorded
+         for the initialization stages (authentication, loading the API spec, generating the commands),
+         each perform command, and each request (with "encode", "http", "decode" and "save_file" sub-spans).
+         e.g. cf = CyberFlood(..., tracer=Tracer(JsonLinesSpanExporter("spans.jsonl")))
+              cf = CyberFlood(..., tracer=Tracer(OtlpSpanExporter("http://collector:4318/v1/traces")))
+         Any object with an export(spans) method can be used as an exporter.
+
+    1.22.0 : 10/19/2026 - Matthew Jefferson
+        -Log records are now written by a background thread (logging.handlers.QueueListener), so the
+         client never waits for the disk. The log handlers are installed once per process, so creating more
+         than one CyberFlood object no longer duplicates every log message. CyberFlood objects created
+         without a log_path keep using the current log file. When a different log file is specified, the
+         log is written to the new file from then on.
+        -Added the log_to_file argument when initializing the CyberFlood class. When False, no log directory
+         or log file is created, and the log is no longer written to a file.
+
+    1.21.0 : 10/19/2026 - Matthew Jefferson
+        -The logging_decorator no longer converts the arguments and return values to strings unless DEBUG
+         logging is enabled. When it is, large values (e.g. test configurations and results) are summarized
+         with reprlib instead of being converted in full. See Benchmarks/logging_decorator_benchmark.py.
+
+    1.20.0 : 10/19/2026 - Matthew Jefferson
+        -Added the collect_metrics argument when initializing the CyberFlood class (and the enable_metrics method).
+         When enabled, every request records its latency, request/response sizes, status code and errors,
+         grouped by perform command and tag. Requests made with the HTTP verb methods are grouped by verb.
+         e.g. cf.metrics()                       # A list of dictionaries, one per command.
+              cf.metrics(format="prometheus")    # The same metrics in the Prometheus text format.
+
+    1.19.0 : 10/19/2026 - Matthew Jefferson
+        -Added the TrafficMix class, for building the traffic mix of a test configuration.
+         e.g. mix = TrafficMix(cf, test_info)
+              mix.add_protocol("SIP", 65)
+              mix.add_profile("RDP_VF", 10)
+         The built-in protocols ("trafficMixesDefaults") are downloaded once per CyberFlood object. See the
+         traffic_mix_defaults method.
+
+    1.18.0 : 10/19/2026 - Matthew Jefferson
+        -Added the iterate_details method. It executes a "list" command, and then yields each item with its
+         details (from the matching "get" command). The next few details are downloaded in the background
+         while the caller is processing the current one.
+         e.g. for test, testinfo in cf.iterate_details("listTests", "getEmixTest", filters={"type": "emix"}):
+
+    1.17.0 : 10/19/2026 - Matthew Jefferson
+        -Added the ControllerSnapshot class. backup() downloads every object that can be listed (concurrently)
+         into a single compressed ZIP archive with a manifest. restore() recreates the objects from an archive,
+         concurrently, creating referenced objects first and replacing the old IDs with the new ones.
+         e.g. ControllerSnapshot(cf).backup("nightly.zip")
+              ControllerSnapshot(cf).restore("nightly.zip", object_types=["Subnets", "Queues"])
+
+    1.16.0 : 10/19/2026 - Matthew Jefferson
+        -Added the delete_many method. It deletes a list of objects of the same type concurrently, and
+         returns the outcome for each ID instead of stopping at the first error.
+         e.g. report = cf.delete_many("Queues", [queueid1, queueid2])
+              report[queueid1]  # {"status": "deleted", "error": None}
+         The optional progress callback is called as each delete completes: progress(completed, total, id, outcome)
+
+    1.15.0 : 10/19/2026 - Matthew Jefferson
+        -Added the create_many method. It executes a "create" command for each payload concurrently
+         (optionally limited to a number of requests per second), and returns the new IDs in input order.
+         e.g. ids = cf.create_many("createIpv4Subnet", [{"name": "s1", ...}, {"name": "s2", ...}], rate=20)
+        -Added the clone_many method. It creates copies of an existing object with new names. When the
+         spec has a "replicate" command for the object (e.g. "ipV4Replicate") that accepts a list of names,
+         it is used to create all of the copies in one request. Otherwise, create_many is used.
+         e.g. ids = cf.clone_many("getIpv4Subnet", subnet_id, ["s1", "s2", "s3"])
+        -Added the RateLimiter class (a thread-safe token bucket).
+
+    1.14.0 : 10/19/2026 - Matthew Jefferson
+        -Added the Reconciler class. It takes a desired-state document (a list of resources), compares it
+         with the objects on the controller, and only creates, updates or deletes what is different.
+         Resources can reference each other, and are applied concurrently in dependency order.
+         e.g. Reconciler(cf).apply([
+                  {"kind": "Ipv4Subnet", "name": "client", "properties": {"addressing": {...}}},
+                  {"kind": "Queue", "name": "my queue", "properties": {"portIds": [{"$port": "10.141.49.19/1/1"}]}},
+                  {"kind": "EmixTest", "name": "my test", "properties": {"config": {"subnets": {"client": [{"$object": "Ipv4Subnet/client"}]}}}},
+                  {"kind": "Ipv4Subnet", "name": "old subnet", "state": "absent"}])
+
+    1.13.0 : 10/19/2026 - Matthew Jefferson
+        -Added the ObjectMirror class. It mirrors every object type in object_types into a local SQLite
+         database, so that read-heavy tools don't need to contact the controller.
+         e.g. mirror = ObjectMirror(cf, "cyberflood.db")
+              mirror.sync()
+              subnets = mirror.find("Subnets", name="scratch_client_b2b_1")
+         Each sync only downloads the details for objects that are new or have changed (based on their
+         modification timestamp, when available), and removes objects that were deleted.
+        -Added the CfCommand get_command method. It returns the "get" command for a "list" command
+         (e.g. "getIpv4Subnet" for "listIpv4Subnets").
+
+    1.12.0 : 10/19/2026 - Matthew Jefferson
+        -Added the resolve_id and resolve_ids methods. They convert object names into IDs for an object type
+         (tag), using a name/ID map that is downloaded once with the "list" commands for that type.
+         e.g. subnet_id = cf.resolve_id("Subnets", "scratch_client_b2b_1")
+              profile_ids = cf.resolve_ids("App Profiles", ["BGP_VF", "RDP_VF"])
+         The map for a type is discarded whenever a create/update/delete command for that type is performed.
+         When a name is used by more than one list command of a type (e.g. an IPv4 and an IPv6 subnet), use
+         the list_command argument, e.g. cf.resolve_id("Subnets", "s1", list_command="listIpv4Subnets").
+
+    1.11.0 : 10/19/2026 - Matthew Jefferson
+        -Added the find_queue_for_ports method. It returns the queue that the specified ports (systemIds)
+         belong to, using an index of the queues that is updated incrementally. Only queues that are new or
+         have changed since the last lookup are downloaded again (concurrently).
+         e.g. queue = cf.find_queue_for_ports(["10.141.49.19/1/1", "10.141.49.19/1/2"])
+
+    1.10.0 : 10/19/2026 - Matthew Jefferson
+        -Added the PortIndex class. It downloads the details for every device once (concurrently), and then
+         looks up ports by their location (systemId) without contacting the controller.
+         e.g. ports = PortIndex(cf, ttl=300)
+              port_id = ports.port_id("10.140.99.10/1/2")
+         The index is refreshed with refresh(), or automatically once it is older than "ttl" seconds.
+        -Added the concurrent_map function, which calls a function for each item using a pool of threads.
+
+    1.9.0 : 10/19/2026 - Matthew Jefferson
+        -Added the "lazy" argument to the "getTestRunResult" perform command. It returns a LazyTestRunResult,
+         which only downloads the "raw" sections that are actually accessed.
+         e.g. result = cf.perform("getTestRunResult", testRunId=runid, testRunResultsId=resultid, lazy=True)
+              summary = result["raw"]["Summary"]
+         If the controller supports a "fields" query parameter for this command, it is used to select the
+         section on the server. Otherwise, the response is streamed and the download stops as soon as the
+         section has been found.
+
+    1.8.0 : 10/19/2026 - Matthew Jefferson
+        -Added the RegressionDetector class. It compares the results of new test runs against a set of
+         baseline runs and flags the metrics that dropped by a statistically significant amount.
+         Metrics are either "raw.Summary" entries (e.g. "Average CPS") or time series, specified as
+         "Section/Series" (e.g. "Connections/Successful Transactions/Second"). Per-protocol metrics
+         (e.g. "Protocol Throughput/Incoming") are compared for each protocol.
+         e.g. RegressionDetector(baseline_results).compare(new_results)
+
+    1.7.0 : 10/19/2026 - Matthew Jefferson
+        -Added the result_cache_path argument when initializing the CyberFlood class. When specified (or when
+         the CF_RESULT_CACHE_DIRECTORY environment variable is set), completed test run results are saved to
+         disk as compressed JSON, and "getTestRunResult"/"listTestRunResults" read them from there instead of
+         downloading them again. Results that are still "running" or "waiting" are never cached.
+
+    1.6.0 : 10/19/2026 - Matthew Jefferson
+        -Added the ResultExporter class. It downloads the results for a list of tests concurrently and
+         writes them to partitioned Parquet files (one "summary" and one "series" dataset), one result at a time.
+         e.g. ResultExporter(cf, "exported_results").export([testid1, testid2])
+         PyArrow is only required when using this class.
+
+    1.5.0 : 10/19/2026 - Matthew Jefferson
+        -Added the TestRunResult class. It wraps a test run result and converts each "raw" time series
+         into NumPy arrays the first time it is accessed, with min/max/mean/percentile helpers.
+         e.g. result = TestRunResult(cf.perform("getTestRunResult", testRunId=runid, testRunResultsId=resultid))
+              result.mean("Connections", "Successful Transactions/Second")
+         NumPy is only required when using this class.
+
     1.4.3 : 01/18/2023 - Matthew Jefferson
         -Now raising an exception if the user authorization fails. It was failing silently before.
 
@@ -121,13 +307,40 @@ import sys
 import json
 import re
 import logging
+import logging.handlers
+import queue
+import atexit
 import datetime
+import time
+import threading
 # Required for processing error messages from the ReST API.
 import ast
 #  import inspect
 import functools
+import contextlib
+# Used by the Profile class.
+import cProfile
+import pstats
+import io
+import codecs
+import base64
+import reprlib
 # Copy is require for the deepcopy function.
 import copy
+import collections
+import collections.abc
+# Used by the MetricsRegistry class.
+import bisect
+# Used by the ResultCache class.
+import gzip
+import hashlib
+import tempfile
+# Used by the ObjectMirror class.
+import sqlite3
+# Used by the ControllerSnapshot class.
+import zipfile
+# Used to download multiple objects from the controller at the same time.
+import concurrent.futures
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 import requests
 
@@ -137,26 +350,119 @@ import requests
 #  import pylibyaml
 import yaml
 
+# NumPy is optional. It is only required by the TestRunResult and RegressionDetector classes.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# PyArrow is optional. It is only required by the ResultExporter class.
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
 LOGGER = logging.getLogger(__name__)
 
 
 # =============================================================================
 def logging_decorator(func):
     """This decorator is used to populate the logs with the Python client commands as they are executed.
+    Nothing is converted to a string unless DEBUG logging is enabled, and large values are summarized.
     """
     @functools.wraps(func)
     def wrapper_decorator(*args, **kwargs):
-        LOGGER.debug("ENTER=%s args=%s kwargs=%s", str(func), str(args),
-                     str(kwargs))
+        if not LOGGER.isEnabledFor(logging.DEBUG):
+            return func(*args, **kwargs)
+
+        LOGGER.debug("ENTER=%s args=%s kwargs=%s", func.__qualname__, _LOG_REPR.repr(args),
+                     _LOG_REPR.repr(kwargs))
 
         value = func(*args, **kwargs)
 
-        LOGGER.debug("LEAVE=%s returns=%s", str(func), str(value))
+        LOGGER.debug("LEAVE=%s returns=%s", func.__qualname__, _LOG_REPR.repr(value))
 
         return value
     return wrapper_decorator
 
 
+# Limits the size of the values written to the log by the logging_decorator.
+_LOG_REPR = reprlib.Repr()
+_LOG_REPR.maxlevel = 4
+_LOG_REPR.maxdict = 25
+_LOG_REPR.maxlist = 25
+_LOG_REPR.maxtuple = 25
+_LOG_REPR.maxstring = 500
+_LOG_REPR.maxother = 500
+
+
+# The log handlers are shared by every CyberFlood object in the process. See configure_logging().
+_LOG_LOCK = threading.Lock()
+_LOG_LISTENER = None
+_LOG_STREAM_HANDLER = None
+_LOG_FILE_HANDLER = None
+
+
+def configure_logging(log_level=logging.INFO, log_file=None):
+    """Set up the CyberFlood logger. This is safe to call more than once.
+
+    The first call attaches a QueueHandler to LOGGER, and starts a QueueListener thread that writes the
+    records to the stream (stderr) handler, and to the file handler. This keeps slow disk writes out of
+    the calling threads. There is only one file handler per process: when a different log file is
+    specified, it replaces the previous one, so each record is written to a single file. When log_file
+    is None, the file handler (if any) is removed.
+    """
+    global _LOG_LISTENER, _LOG_STREAM_HANDLER, _LOG_FILE_HANDLER
+
+    formatter = logging.Formatter("%(asctime)s %(message)s")
+
+    with _LOG_LOCK:
+        LOGGER.setLevel(log_level)
+
+        if _LOG_LISTENER is None:
+            _LOG_STREAM_HANDLER = logging.StreamHandler()
+            _LOG_STREAM_HANDLER.setFormatter(formatter)
+
+            log_queue = queue.SimpleQueue()
+            LOGGER.addHandler(logging.handlers.QueueHandler(log_queue))
+
+            _LOG_LISTENER = logging.handlers.QueueListener(log_queue, _LOG_STREAM_HANDLER, respect_handler_level=True)
+            _LOG_LISTENER.start()
+
+            # Write any queued records before the interpreter exits.
+            atexit.register(_LOG_LISTENER.stop)
+
+        _LOG_STREAM_HANDLER.setLevel(log_level)
+
+        previous = _LOG_FILE_HANDLER
+        if log_file:
+            log_file = os.path.abspath(log_file)
+
+            if previous is not None and previous.baseFilename == log_file:
+                previous.setLevel(log_level)
+                return
+
+            if not os.path.exists(os.path.dirname(log_file)):
+                os.makedirs(os.path.dirname(log_file))
+
+            _LOG_FILE_HANDLER = logging.FileHandler(log_file, mode="w")
+            _LOG_FILE_HANDLER.setFormatter(formatter)
+            _LOG_FILE_HANDLER.setLevel(log_level)
+        elif previous is not None:
+            _LOG_FILE_HANDLER = None
+        else:
+            return
+
+        # Write the queued records to the previous file before switching.
+        _LOG_LISTENER.stop()
+        _LOG_LISTENER.handlers = (_LOG_STREAM_HANDLER,) if _LOG_FILE_HANDLER is None else (_LOG_STREAM_HANDLER, _LOG_FILE_HANDLER)
+        _LOG_LISTENER.start()
+
+        if previous is not None:
+            previous.close()
+
+
 # Copyright Ferry Boender, released under the MIT license.
 def deepupdate(target, src):
     """Deep update target dict with src
@@ -191,17 +497,532 @@ def deepupdate(target, src):
             target[k] = copy.copy(v)
 
 
+def concurrent_map(function, items, max_workers=8):
+    """Call function(item) for each item, using a pool of threads.
+    The results are returned as a list, in the same order as the items. The first exception is raised.
+    """
+    items = list(items)
+
+    if len(items) <= 1 or max_workers <= 1:
+        return [function(item) for item in items]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(function, items))
+
+
+# The perform command (CfCommand) being executed by the current thread. Used by the metrics and tracing.
+_command_context = threading.local()
+
+# The request statistics for the current thread, used by the Profile connection timers.
+_connection_timing = threading.local()
+
+
+# Used in place of a span when tracing is disabled.
+_NO_SPAN = contextlib.nullcontext()
+
+
+class Tracer:
+    """Records tracing spans, and passes each finished span to an exporter.
+
+    Spans are nested per thread: a span started while another span is active (in the same thread) becomes
+    its child, and shares its trace ID. Each span is a dictionary:
+        {"name", "trace_id", "span_id", "parent_id", "start_time_ns", "end_time_ns", "duration_seconds",
+         "attributes", "status", "error"}
+    """
+    def __init__(self, exporter):
+        self.exporter = exporter
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def span(self, name, **attributes):
+        stack = self._local.__dict__.setdefault("stack", [])
+        parent = stack[-1] if stack else None
+
+        span = {"name": name,
+                "trace_id": parent["trace_id"] if parent else os.urandom(16).hex(),
+                "span_id": os.urandom(8).hex(),
+                "parent_id": parent["span_id"] if parent else None,
+                "start_time_ns": time.time_ns(),
+                "end_time_ns": None,
+                "duration_seconds": None,
+                "attributes": attributes,
+                "status": "ok",
+                "error": None}
+
+        stack.append(span)
+        start = time.perf_counter_ns()
+        try:
+            yield span
+        except BaseException as e:
+            span["status"] = "error"
+            span["error"] = str(e)
+            raise
+        finally:
+            duration = time.perf_counter_ns() - start
+            span["end_time_ns"] = span["start_time_ns"] + duration
+            span["duration_seconds"] = duration / 1e9
+            stack.pop()
+
+            try:
+                self.exporter.export([span])
+            except Exception as e:
+                LOGGER.warning("Unable to export the span '%s': %s", name, str(e))
+
+    def shutdown(self):
+        if hasattr(self.exporter, "shutdown"):
+            self.exporter.shutdown()
+
+
+class JsonLinesSpanExporter:
+    """Appends each span to a file, as one JSON object per line.
+    """
+    def __init__(self, filename):
+        self.filename = os.path.abspath(filename)
+        self._file = open(self.filename, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        lines = "".join(json.dumps(span, default=str) + "\n" for span in spans)
+
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+
+    def shutdown(self):
+        with self._lock:
+            self._file.close()
+
+
+class OtlpSpanExporter:
+    """Sends spans to an OpenTelemetry collector, using OTLP/HTTP with JSON encoding.
+    e.g. OtlpSpanExporter("http://localhost:4318/v1/traces")
+
+    Spans are sent in batches of "batch_size". Call shutdown() (or wait for the interpreter to exit) to send
+    the remaining spans.
+    """
+    def __init__(self, endpoint, service_name="cyberflood-client", batch_size=100, headers=None, timeout=10):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.timeout = timeout
+
+        self._session = requests.session()
+        self._session.headers.update(headers or {})
+        self._spans = []
+        self._lock = threading.Lock()
+
+        atexit.register(self.shutdown)
+
+    def export(self, spans):
+        with self._lock:
+            self._spans.extend(spans)
+            if len(self._spans) < self.batch_size:
+                return
+
+            batch, self._spans = self._spans, []
+
+        self._send(batch)
+
+    def shutdown(self):
+        with self._lock:
+            batch, self._spans = self._spans, []
+
+        if batch:
+            self._send(batch)
+
+    def _send(self, spans):
+        body = {"resourceSpans": [{"resource": {"attributes": [self._attribute("service.name", self.service_name)]},
+                                   "scopeSpans": [{"scope": {"name": "CyberFlood", "version": __version__},
+                                                   "spans": [self._convert(span) for span in spans]}]}]}
+
+        response = self._session.post(self.endpoint, json=body, timeout=self.timeout)
+        if not response.ok:
+            LOGGER.warning("The OpenTelemetry collector rejected %d spans (%d).", len(spans), response.status_code)
+
+    def _convert(self, span):
+        converted = {"traceId": span["trace_id"],
+                     "spanId": span["span_id"],
+                     "name": span["name"],
+                     # SPAN_KIND_CLIENT for requests, SPAN_KIND_INTERNAL for everything else.
+                     "kind": 3 if span["name"] == "http" else 1,
+                     "startTimeUnixNano": str(span["start_time_ns"]),
+                     "endTimeUnixNano": str(span["end_time_ns"]),
+                     "attributes": [self._attribute(key, value) for key, value in span["attributes"].items()],
+                     "status": {"code": 2, "message": span["error"]} if span["status"] == "error" else {"code": 1}}
+
+        if span["parent_id"]:
+            converted["parentSpanId"] = span["parent_id"]
+
+        return converted
+
+    @staticmethod
+    def _attribute(key, value):
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class MetricsRegistry:
+    """A thread-safe collection of request metrics, grouped by command and tag.
+    The latency of each request is counted in a histogram with fixed buckets (in seconds).
+    """
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def record(self, command, tag, seconds, status=None, request_bytes=0, response_bytes=0, error=False, throttled_seconds=0.0):
+        with self._lock:
+            metric = self._metrics.get((command, tag))
+            if metric is None:
+                metric = {"command": command, "tag": tag, "count": 0, "errors": 0,
+                          "total_seconds": 0.0, "max_seconds": 0.0,
+                          "bucket_counts": [0] * (len(self.buckets) + 1),
+                          "status": {}, "request_bytes": 0, "response_bytes": 0, "throttled_seconds": 0.0}
+                self._metrics[(command, tag)] = metric
+
+            metric["count"] += 1
+            metric["total_seconds"] += seconds
+            metric["max_seconds"] = max(metric["max_seconds"], seconds)
+            metric["bucket_counts"][bisect.bisect_left(self.buckets, seconds)] += 1
+            metric["request_bytes"] += request_bytes
+            metric["response_bytes"] += response_bytes
+            metric["throttled_seconds"] += throttled_seconds
+
+            if status is not None:
+                metric["status"][status] = metric["status"].get(status, 0) + 1
+            if error:
+                metric["errors"] += 1
+
+    def reset(self):
+        with self._lock:
+            self._metrics = {}
+
+    def snapshot(self):
+        """Return a copy of the metrics, sorted by the total time spent in each command.
+        """
+        with self._lock:
+            metrics = copy.deepcopy(list(self._metrics.values()))
+
+        for metric in metrics:
+            metric["mean_seconds"] = metric["total_seconds"] / metric["count"] if metric["count"] else 0.0
+
+            # The histogram is cumulative, as in Prometheus.
+            counts = metric.pop("bucket_counts")
+            metric["histogram"] = {}
+            total = 0
+            for bound, count in zip(list(self.buckets) + [float("inf")], counts):
+                total += count
+                metric["histogram"][bound] = total
+
+        return sorted(metrics, key=lambda metric: metric["total_seconds"], reverse=True)
+
+    def to_prometheus(self):
+        """Return the metrics in the Prometheus text exposition format.
+        """
+        lines = ["# HELP cyberflood_request_duration_seconds CyberFlood ReST API request latency.",
+                 "# TYPE cyberflood_request_duration_seconds histogram"]
+        metrics = self.snapshot()
+
+        for metric in metrics:
+            labels = 'command="%s",tag="%s"' % (_prometheus_escape(metric["command"]), _prometheus_escape(metric["tag"]))
+            for bound, count in metric["histogram"].items():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append('cyberflood_request_duration_seconds_bucket{%s,le="%s"} %d' % (labels, le, count))
+            lines.append("cyberflood_request_duration_seconds_sum{%s} %r" % (labels, metric["total_seconds"]))
+            lines.append("cyberflood_request_duration_seconds_count{%s} %d" % (labels, metric["count"]))
+
+        for name, key, help_text in (("cyberflood_request_errors_total", "errors", "Failed requests."),
+                                     ("cyberflood_request_bytes_total", "request_bytes", "Request body bytes sent."),
+                                     ("cyberflood_response_bytes_total", "response_bytes", "Response body bytes received.")):
+            lines.append("# HELP " + name + " " + help_text)
+            lines.append("# TYPE " + name + " counter")
+            for metric in metrics:
+                labels = 'command="%s",tag="%s"' % (_prometheus_escape(metric["command"]), _prometheus_escape(metric["tag"]))
+                lines.append("%s{%s} %d" % (name, labels, metric[key]))
+
+        lines.append("# HELP cyberflood_throttled_seconds_total Time spent waiting for the client-side rate and concurrency limits.")
+        lines.append("# TYPE cyberflood_throttled_seconds_total counter")
+        for metric in metrics:
+            labels = 'command="%s",tag="%s"' % (_prometheus_escape(metric["command"]), _prometheus_escape(metric["tag"]))
+            lines.append("cyberflood_throttled_seconds_total{%s} %r" % (labels, metric["throttled_seconds"]))
+
+        lines.append("# HELP cyberflood_responses_total Responses by HTTP status code.")
+        lines.append("# TYPE cyberflood_responses_total counter")
+        for metric in metrics:
+            labels = 'command="%s",tag="%s"' % (_prometheus_escape(metric["command"]), _prometheus_escape(metric["tag"]))
+            for status, count in sorted(metric["status"].items()):
+                lines.append('cyberflood_responses_total{%s,code="%s"} %d' % (labels, status, count))
+
+        return "\n".join(lines) + "\n"
+
+
+def _prometheus_escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RateLimiter:
+    """A thread-safe token bucket. acquire() blocks until a token is available.
+    Tokens are added at "rate" per second, up to "burst" tokens.
+    """
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, self.rate))
+
+        self.tokens = self.burst
+        self.timestamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, waiting if necessary. Returns the number of seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.timestamp) * self.rate)
+                self.timestamp = now
+
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return waited
+
+                delay = (1.0 - self.tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+
+class RequestGovernor:
+    """Limits the requests sent to a controller: the request rate (a token bucket) and the number of
+    requests in flight. Limits may also be set for a command tag (object type), in addition to the
+    controller limits.
+    e.g. governor = RequestGovernor(rate=20, max_in_flight=8)
+         governor.set_limit(rate=2, tag="Tests")
+    A governor may be shared by several CyberFlood objects that use the same controller.
+    """
+    def __init__(self, rate=None, burst=None, max_in_flight=None):
+        self._limits = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+        self.set_limit(rate, burst, max_in_flight)
+
+    def set_limit(self, rate=None, burst=None, max_in_flight=None, tag=None):
+        """Set (or remove, when rate and max_in_flight are both None) the limits for a tag.
+        The controller limits are used when tag is None.
+        """
+        limit = {"rate": rate, "burst": burst, "max_in_flight": max_in_flight,
+                 "limiter": RateLimiter(rate, burst) if rate else None,
+                 "semaphore": threading.BoundedSemaphore(max_in_flight) if max_in_flight else None}
+
+        with self._lock:
+            if limit["limiter"] is None and limit["semaphore"] is None:
+                self._limits.pop(tag, None)
+            else:
+                self._limits[tag] = limit
+
+    def limits(self):
+        """Return the configured limits, keyed by tag (None for the controller limits).
+        """
+        with self._lock:
+            return {tag: {key: limit[key] for key in ("rate", "burst", "max_in_flight")} for tag, limit in self._limits.items()}
+
+    @contextlib.contextmanager
+    def slot(self, tag=""):
+        """Wait until a request for the tag may be sent. Returns a context manager that holds the
+        in-flight slot until it exits, and yields the number of seconds spent waiting.
+        """
+        with self._lock:
+            # The tag limits are always taken before the controller limits, to avoid a deadlock.
+            limits = [self._limits[key] for key in ((tag, None) if tag else (None,)) if key in self._limits]
+
+        acquired = []
+        start = time.perf_counter()
+        try:
+            for limit in limits:
+                if limit["limiter"] is not None:
+                    limit["limiter"].acquire()
+
+            for limit in limits:
+                if limit["semaphore"] is not None:
+                    limit["semaphore"].acquire()
+                    acquired.append(limit["semaphore"])
+
+            waited = time.perf_counter() - start
+
+            with self._lock:
+                stats = self._stats.setdefault(tag, {"requests": 0, "in_flight": 0, "throttled_seconds": 0.0, "max_throttled_seconds": 0.0})
+                stats["requests"] += 1
+                stats["in_flight"] += 1
+                stats["throttled_seconds"] += waited
+                stats["max_throttled_seconds"] = max(stats["max_throttled_seconds"], waited)
+
+            try:
+                yield waited
+            finally:
+                with self._lock:
+                    stats["in_flight"] -= 1
+        finally:
+            for semaphore in reversed(acquired):
+                semaphore.release()
+
+    def snapshot(self):
+        """Return the number of requests, the number currently in flight, and the time spent waiting, by tag.
+        """
+        with self._lock:
+            return copy.deepcopy(self._stats)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is rejected because the controller's circuit breaker is open.
+    """
+    pass
+
+
+class CircuitBreaker:
+    """Tracks the health of a controller, and stops sending requests to it when it is failing.
+        closed    - Requests are sent normally. The circuit opens after "failure_threshold" consecutive failures.
+        open      - Requests fail immediately (CircuitOpenError) for "reset_timeout" seconds.
+        half_open - Up to "half_open_requests" probe requests are sent. The circuit closes when a probe
+                    succeeds, and opens again when one fails.
+    Connection errors, timeouts and 5xx responses are failures. Other error responses (e.g. 404) are not,
+    because the controller answered them. Use the CyberFlood timeout argument, so that requests to a
+    controller that has stopped responding fail (and count) quickly.
+    A circuit breaker may be shared by several CyberFlood objects that use the same controller.
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, half_open_requests=1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_requests = half_open_requests
+
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.failures = 0
+        self.successes = 0
+        self.rejected = 0
+        self.last_error = None
+        self.opened_at = None
+
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """Raise a CircuitOpenError if a request may not be sent now.
+        """
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._probes = 0
+                LOGGER.info("The circuit is half open. Probing the controller.")
+
+            if self.state == "half_open":
+                if self._probes < self.half_open_requests:
+                    self._probes += 1
+                    return
+            elif self.state == "closed":
+                return
+
+            self.rejected += 1
+            retry = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)) if self.state == "open" else 0.0
+
+        raise CircuitOpenError("The controller is unavailable (circuit open after %d consecutive failures; retry in %.1fs). Last error: %s"
+                               % (self.consecutive_failures, retry, self.last_error))
+
+    def record_response(self, response):
+        if response.status_code >= 500:
+            self.record_failure("HTTP " + str(response.status_code))
+        else:
+            self.record_success()
+
+    def record_exception(self, exception):
+        if isinstance(exception, requests.exceptions.RequestException):
+            self.record_failure(type(exception).__name__ + ": " + str(exception))
+        else:
+            # The request didn't complete (e.g. KeyboardInterrupt), so it says nothing about the controller.
+            with self._lock:
+                if self.state == "half_open":
+                    self._probes = max(0, self._probes - 1)
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+
+            if self.state != "closed":
+                LOGGER.info("The controller is available again. Closing the circuit.")
+                self.state = "closed"
+                self.opened_at = None
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = error
+
+            if self.state == "half_open" or (self.state == "closed" and self.consecutive_failures >= self.failure_threshold):
+                LOGGER.warning("Opening the circuit after %d consecutive failures: %s", self.consecutive_failures, error)
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def reset(self):
+        """Close the circuit, e.g. after the controller is known to be available again.
+        """
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.opened_at = None
+
+    def health(self):
+        """Return the state of the circuit, and whether requests are currently allowed ("available").
+        """
+        with self._lock:
+            retry = 0.0
+            if self.state == "open":
+                retry = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+                available = retry == 0.0
+            elif self.state == "half_open":
+                # Requests are rejected while every probe is in flight.
+                available = self._probes < self.half_open_requests
+            else:
+                available = True
+
+            return {"state": self.state,
+                    "available": available,
+                    "retry_in_seconds": retry,
+                    "consecutive_failures": self.consecutive_failures,
+                    "failures": self.failures,
+                    "successes": self.successes,
+                    "rejected": self.rejected,
+                    "last_error": self.last_error}
+
+
 # =============================================================================
 class CyberFlood:
-    def __init__(self, username, password, controller_address, perform_commands=True, use_yaml_cache=True, log_level="INFO", log_path=None):
+    def __init__(self, username, password, controller_address, perform_commands=True, use_yaml_cache=True, log_level="INFO", log_path=None, result_cache_path=None, collect_metrics=False, log_to_file=True, tracer=None, cassette=None, governor=None, circuit_breaker=None, timeout=None):
 
         requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
         arguments = locals()
 
+        # Tracing is optional. See the Tracer class.
+        self.tracer = tracer
+
+        # Requests may be recorded to (or replayed from) a cassette file. See the Cassette class.
+        self.cassette = cassette
+
         self.username = username
         self.password = password
-        self.controller_address = "https://" + controller_address + "/api/v2"
+        if re.match("https?://", controller_address, flags=re.I):
+            self.controller_address = controller_address.rstrip("/") + "/api/v2"
+        else:
+            self.controller_address = "https://" + controller_address + "/api/v2"
 
         # Enabling the "Perform Commands" adds a fixed amount initialization overhead (time) for the CyberFlood API.
         self.perform_commands = perform_commands
@@ -211,6 +1032,40 @@ class CyberFlood:
         # This dictionary contains an entry for each CyberFlood object type, and a list of each command that can be used with that object.
         self.object_types = {}
 
+        # Completed test run results are cached on disk when a cache directory is specified.
+        result_cache_path = result_cache_path or os.getenv("CF_RESULT_CACHE_DIRECTORY")
+        if result_cache_path:
+            self.result_cache = ResultCache(result_cache_path, self.controller_address)
+        else:
+            self.result_cache = None
+
+        # Per-command request metrics. These are only collected when enabled, to avoid the overhead.
+        self.metrics_registry = MetricsRegistry() if collect_metrics else None
+        self._stopped_metrics_registry = None
+
+        # Limits the request rate and concurrency. See the limit_requests method.
+        self.governor = governor
+
+        # Fails requests fast while the controller is unavailable. See the CircuitBreaker class.
+        self.circuit_breaker = circuit_breaker
+
+        # The number of seconds to wait for the controller (to connect, and between bytes of the response).
+        # None waits forever. Use a timeout with a circuit breaker, so that a hung controller trips it.
+        self.timeout = timeout
+
+        # Set while a Profile is active. See the profile method.
+        self._profiler = None
+
+        # The built-in traffic mix protocols are downloaded the first time they are needed.
+        self._traffic_mix_defaults = None
+        self._traffic_mix_lock = threading.Lock()
+
+        # The name/ID maps for each object type are built the first time they are needed.
+        self.name_resolver = NameResolver(self)
+
+        # The queue index is built the first time find_queue_for_ports() is called.
+        self.queue_index = QueueIndex(self)
+
         self.__bearerToken = None
         #  self.__isLogged = False
         self.__session = requests.session()
@@ -233,10 +1088,16 @@ class CyberFlood:
             self.log_path = log_path
 
         self.log_path = os.path.abspath(self.log_path)
-        self.log_file = os.path.join(self.log_path, "cf_restapi.log")
 
-        if not os.path.exists(self.log_path):
-            os.makedirs(self.log_path)
+        if not log_to_file:
+            self.log_file = None
+        elif not log_path and not os.getenv("CF_LOG_OUTPUT_DIRECTORY") and _LOG_FILE_HANDLER is not None:
+            # Keep using the log file of the previous CyberFlood object, rather than starting a new one.
+            self.log_file = _LOG_FILE_HANDLER.baseFilename
+            self.log_path = os.path.dirname(self.log_file)
+        else:
+            # The directory is created by configure_logging().
+            self.log_file = os.path.join(self.log_path, "cf_restapi.log")
 
         if log_level.upper() == "ERROR":
             self.log_level = logging.ERROR
@@ -249,25 +1110,8 @@ class CyberFlood:
         else:
             self.log_level = logging.INFO
 
-        ##
-        # Create stream and file logger assuming this class will be treated
-        # as a singleton.
-        #
-        # log to stream
-        LOGGER.setLevel(self.log_level)
-        formatter = logging.Formatter("%(asctime)s %(message)s")
-
-        stream_logger = logging.StreamHandler()
-        stream_logger.setLevel(self.log_level)
-        stream_logger.setFormatter(formatter)
-        LOGGER.addHandler(stream_logger)
-
-        # log to file
-        file_logger = logging.FileHandler(self.log_file, mode="w")
-        file_logger.setLevel(self.log_level)
-        file_logger.setFormatter(formatter)
-        LOGGER.addHandler(file_logger)
-        ##
+        # The stream and file handlers are shared by every CyberFlood object in the process.
+        configure_logging(self.log_level, self.log_file)
 
         # The logger is now ready.
         LOGGER.info("Executing __init__: %s", str(arguments))
@@ -275,21 +1119,26 @@ class CyberFlood:
         requests_log = logging.getLogger("requests.packages.urllib3")
         requests_log.propagate = True
 
-        # Authenticate. This will allow all subsequent calls to use the token.
-        response = self.__session.post(self.controller_address + '/token', data={'email': self.username, 'password': self.password})
+        with self._span("CyberFlood.__init__", controller=self.controller_address):
+            # Authenticate. This will allow all subsequent calls to use the token.
+            with self._span("authenticate"):
+                # The credentials are never recorded in a cassette.
+                response = self._cassette_send("post", self.controller_address + '/token', None,
+                                               lambda: self.__session.post(self.controller_address + '/token', data={'email': self.username, 'password': self.password}, timeout=self.timeout))
 
-        if response.status_code == 201:
-            self.__bearerToken = json.loads(response.text)['token']
-            self.__session.headers.update(Authorization='Bearer ' + self.__bearerToken)
-        else:
-            errmsg = "Authorization failed. Please check user credentials."
-            LOGGER.error(errmsg)
-            raise Exception(errmsg)
+            if response.status_code == 201:
+                self.__bearerToken = json.loads(response.text)['token']
+                self.__session.headers.update(Authorization='Bearer ' + self.__bearerToken)
+            else:
+                errmsg = "Authorization failed. Please check user credentials."
+                LOGGER.error(errmsg)
+                raise Exception(errmsg)
 
-        if self.perform_commands:
-            # Perform Commands are enabled. We need to download the OpenAPI.yaml file and
-            # generate the class objects for each command.
-            self._enable_perform_commands(use_cached_commands=use_yaml_cache)
+            if self.perform_commands:
+                # Perform Commands are enabled. We need to download the OpenAPI.yaml file and
+                # generate the class objects for each command.
+                with self._span("enable_perform_commands", use_yaml_cache=use_yaml_cache):
+                    self._enable_perform_commands(use_cached_commands=use_yaml_cache)
 
     @logging_decorator
     def post(self, url, *args, **kwargs):
@@ -312,7 +1161,7 @@ class CyberFlood:
         return result
 
     @logging_decorator
-    def perform(self, command_name, *args, command_type=None, **kwargs):
+    def perform(self, command_name, *args, command_type=None, lazy=False, **kwargs):
         """This method is used to execute "Perform Commands". These are the commands that are listed
         in the CyberFlood API documentation. This method uses the CfCommand objects.
         e.g.
@@ -338,157 +1187,631 @@ class CyberFlood:
 
         command = self.commands[command_name][command_type]
 
-        result = command.perform(*args, **kwargs)
+        if lazy:
+            if command.name != "getTestRunResult":
+                raise Exception("The 'lazy' argument is not supported by the command '" + command_name + "'.")
+
+            cached = self.result_cache.get(kwargs.get("testRunResultsId")) if self.result_cache else None
+            return cached if cached is not None else LazyTestRunResult(self, command, **kwargs)
+
+        if self.result_cache and command.name in ResultCache.commands:
+            result = self._perform_cached(command, *args, **kwargs)
+        else:
+            result = command.perform(*args, **kwargs)
+
+        if command.name in QueueIndex.modifying_commands:
+            self.queue_index.invalidate()
+
+        if NameResolver.is_modifying(command):
+            self.name_resolver.invalidate(command.tag)
 
         return result
 
-    def exec(self, httpverb, url, *args, filters=None, upload_filename=None, **kwargs):
-        """Send the specified HTTP request to the CyberFlood ReST API.
-        The filter argument is special. It is a dictionary of filters that must be added to the URL.
+    def resolve_id(self, object_type, name, list_command=None):
+        """Return the ID of the object with the specified name, or None if it doesn't exist.
+        The object_type is one of the keys in object_types (e.g. "Subnets").
+        When an object type has more than one list command (e.g. "listIpv4Subnets" and "listIpv6Subnets"),
+        and the name is used by more than one of them, the list_command argument is required.
+        """
+        return self.name_resolver.resolve(object_type, name, list_command)
 
-        Use the "upload_filename" argument to upload files to the server.
+    def resolve_ids(self, object_type, names, list_command=None):
+        """Return a list with the ID for each of the specified names (None for names that don't exist).
         """
+        return self.name_resolver.resolve_many(object_type, names, list_command)
 
-        # Construct the complete URL.
-        url = self.controller_address + url
-        url += self._add_filters(filters)
+    def create_many(self, command_name, payloads, command_type=None, max_workers=8, rate=None):
+        """Execute the specified "create" command once for each payload, concurrently.
+        Returns a list of the new object IDs, in the same order as the payloads.
+        The rate argument limits the number of requests per second.
+        """
+        limiter = RateLimiter(rate) if rate else None
 
-        # Construct the json_payload, which can be a combination of args and kwargs.
-        payload = {}
-        json_payload = {}
+        def create(payload):
+            if limiter:
+                limiter.acquire()
 
-        if args:
-            # Only one positional arg is supported, and it must be a dictionary.
-            payload = args[0]
+            result = self.perform(command_name, copy.deepcopy(payload), command_type=command_type)
+            return result.get("id") if isinstance(result, dict) else None
 
-        # Merge the kwargs into the payload dictionary.
-        deepupdate(payload, kwargs)
+        return concurrent_map(create, payloads, max_workers)
 
-        if len(list(payload.keys())) > 0:
-            json_payload = json.dumps(payload)
+    def clone_many(self, get_command_name, source_id, names, command_type=None, max_workers=8, rate=None):
+        """Create a copy of an existing object for each of the specified names.
+        e.g. cf.clone_many("getIpv4Subnet", subnet_id, ["s1", "s2"])
+        Returns a list of the new object IDs, in the same order as the names.
+        """
+        if not self.perform_commands:
+            raise Exception("Perform Commands are not enabled. Use the perform_commands=True argument when initializing the CyberFlood client.")
 
-        httpverb = httpverb.lower()
+        commands = self.commands.get(get_command_name)
+        if not commands:
+            raise Exception("The command '" + get_command_name + "' is not valid.")
 
-        if upload_filename:
-            filedata = open(upload_filename, "rb")
-            filejson = {"file": filedata}
-            response = self.__session.post(url, files=filejson, data=payload, verify=False)
+        get_command = commands[command_type or list(commands.keys())[0]]
+        id_argument = re.findall("{(.+?)}", get_command.path)[-1]
 
-        elif httpverb == "get":
-            response = self.__session.get(url, data=json_payload, headers={'Content-Type': 'application/json'}, verify=False)
-        elif httpverb == "post":
-            response = self.__session.post(url, data=json_payload, headers={'Content-Type': 'application/json'}, verify=False)
-        elif httpverb == "put":
-            response = self.__session.put(url, data=json_payload, headers={'Content-Type': 'application/json'}, verify=False)
-        elif httpverb == "delete":
-            response = self.__session.delete(url)
-        else:
-            raise Exception("ERROR: The command '" + httpverb + "' is not valid.")
+        replicate = self._replicate_command(get_command, id_argument)
+        if replicate:
+            LOGGER.info("Replicating %s %s %d times with %s", get_command.tag, source_id, len(names), replicate.name)
 
-        if not response.ok:
-            self._process_error(response)
+            # The replicate command doesn't necessarily return the new objects, so look them up by name.
+            # Only the objects that didn't exist beforehand are used, in case one of the names is already taken.
+            existing = set(object_id for name, object_id in self.name_resolver.list_objects(get_command.tag))
 
-        return_value = None
+            replicate.perform(names=list(names), **{id_argument: source_id})
+            self.name_resolver.invalidate(get_command.tag)
 
-        # print("HERE")
-        # import pprint
-        # pp = pprint.PrettyPrinter(indent=2)
-        # # pp.pprint(response.url)
-        # pp.pprint(response.status_code)
-        # # pp.pprint(response.encoding)
-        # pp.pprint(response.headers)
-        # pp.pprint(response)
-        # pp.pprint("Content=")
-        # print(response.content)
+            created = {}
+            for name, object_id in self.name_resolver.list_objects(get_command.tag):
+                if object_id not in existing:
+                    created.setdefault(name, []).append(object_id)
 
-        # print("======")
-        # print("Text:")
-        # print(response.text)
+            ids = [created[name].pop(0) if created.get(name) else None for name in names]
+            if None not in ids:
+                return ids
 
-        # Process the response.
-        content_disposition = response.headers.get("content-disposition")
+            raise Exception("Unable to find the objects created by " + replicate.name + ": " + str([name for name, object_id in zip(names, ids) if object_id is None]))
 
-        if response.status_code == 204:
-            # This happens with DELETE.
-            return_value = None
-        elif response.headers.get("content-type") == "application/json":
-            return_value = response.json()
-        elif content_disposition and re.match("attachment", content_disposition, flags=re.I):
-            # The response contained an attachment.
-            # The content-disposition will look something like this: attachment; filename="event.log"
-            match = re.search("filename=\"(.+)\"", content_disposition, flags=re.I)
-            filename = match.group(1)
-            return_value = self._save_file(response, filename)
-        elif response.headers.get("content-type") == "application/octet-stream":
-            # This is probably a file as well. The last part of the URL should be the filename.
-            # e.g. "https://1.1.1.1/api/v2/documentation/openapi.yaml"
-            if url.find('/'):
-                # Extract the filename from the URL.
-                filename = url.rsplit('/', 1)[1]
-            else:
-                filename = "unknown_file"
+        source = get_command.perform(**{id_argument: source_id})
+        source.pop("id", None)
 
-            return_value = self._save_file(response, filename)
-        else:
-            # Whoops...looks like we got a response that wasn't anticipated.
-            LOGGER.debug(str(response.headers.get))
-            raise Exception("ERROR: Unknown response type (" + str(response.headers.get("content-type")) + ").")
+        payloads = []
+        for name in names:
+            payload = copy.deepcopy(source)
+            payload["name"] = name
+            payloads.append(payload)
 
-        return return_value
+        return self.create_many("create" + get_command.name[len("get"):], payloads, command_type=get_command.tag,
+                                max_workers=max_workers, rate=rate)
 
-    def _save_file(self, response, filename, directory=None):
-        """ Save a file attachment from a response to the current directory (or possibly a subdirectory).
+    def _replicate_command(self, get_command, id_argument):
+        """Return the "replicate" command for the object type of the get command, if the spec defines one
+        that copies an object (by ID) and accepts a list of names. Otherwise, return None.
         """
+        for command in self.object_types.get(get_command.tag, {}).values():
+            if "replicate" not in command.name.lower() or command.httpverb != "post":
+                continue
 
-        if directory:
-            filename = os.path.join(directory, filename)
-
-        filename = os.path.abspath(filename)
-        path = os.path.dirname(filename)
+            if command.path_parameters != [id_argument] or not command.path.startswith(get_command.path):
+                continue
 
-        if not os.path.exists(path):
-            os.makedirs(path)
+            content = command.definition.get("requestBody", {}).get("content", {})
+            schema = content.get("application/json", {}).get("schema", {})
+            if schema.get("properties", {}).get("names", {}).get("type") == "array":
+                return command
 
-        try:
-            with open(filename, 'wb') as f:
-                for buff in response.iter_content(chunk_size=16384):
-                    f.write(buff)
-        except Exception as e:
-            raise RuntimeError("Could not download file: " + str(e))
-        finally:
-            response.close()
+        return None
 
-        return filename
+    def delete_many(self, object_type, ids, command_name=None, max_workers=8, progress=None):
+        """Delete each of the specified objects, concurrently.
+        The object_type is one of the keys in object_types (e.g. "Subnets"). The delete command is found
+        automatically, unless there is more than one for the object type (e.g. "deleteIpv4Subnet" and
+        "deleteIpv6Subnet"). In that case, the command_name argument is required.
 
-    def _add_filters(self, filters):
-        """Convert any filters, specified as a dictionary by the user, into a string for a URL.
+        Returns a dictionary with the outcome for each ID, in the same order as the IDs:
+            {id: {"status": "deleted" | "failed", "error": None | "error message"}}
         """
-        filtersurl = ""
-        if filters:
-            # The user may specify a multi-key filter with a "dash" delimiter.
-            # e.g. duration-lt translates to filter[duration][lt].
+        if object_type not in self.object_types:
+            raise Exception("The object type '" + str(object_type) + "' is not valid.")
 
-            for key in filters.keys():
-                if filtersurl != "":
-                    filtersurl += "&"
+        if command_name:
+            commands = [command for command in self.object_types[object_type].values() if command.name == command_name]
+        else:
+            commands = [command for command in self.object_types[object_type].values()
+                        if command.name.startswith("delete") and command.httpverb == "delete" and len(re.findall("{.+?}", command.path)) == 1]
 
-                filtersurl += "filter"
-                for subfilter in key.split("-"):
-                    filtersurl += "[" + subfilter + "]"
+        if len(commands) != 1:
+            errmsg = "Unable to determine the delete command for '" + object_type + "'"
+            if commands:
+                errmsg += ". Use the command_name argument to choose one of: " + ", ".join(sorted(command.name for command in commands))
+            raise Exception(errmsg + ".")
 
-                #  value = requests.utils.quote(filters[key])
-                value = filters[key]
-                filtersurl += "=" + str(value)
+        command = commands[0]
+        id_argument = re.findall("{(.+?)}", command.path)[-1]
 
-            filtersurl = "?" + filtersurl
+        def delete(object_id):
+            try:
+                self.perform(command.name, command_type=command.tag, **{id_argument: object_id})
+                return {"status": "deleted", "error": None}
+            except Exception as e:
+                return {"status": "failed", "error": str(e)}
 
-        return filtersurl
+        # Each object is only deleted once, even if its ID is repeated.
+        ids = list(dict.fromkeys(ids))
+        outcomes = {}
 
-    def _process_error(self, response):
-        """Handle error responses from the CyberFlood ReST API.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(ids)))) as executor:
+            futures = {executor.submit(delete, object_id): object_id for object_id in ids}
+
+            for future in concurrent.futures.as_completed(futures):
+                object_id = futures[future]
+                outcomes[object_id] = future.result()
+
+                if progress:
+                    progress(len(outcomes), len(ids), object_id, outcomes[object_id])
+
+        failed = sum(1 for outcome in outcomes.values() if outcome["status"] == "failed")
+        LOGGER.info("Deleted %d %s (%d failed).", len(ids) - failed, object_type, failed)
+
+        return {object_id: outcomes[object_id] for object_id in ids}
+
+    def iterate_details(self, list_command_name, get_command_name=None, *args, prefetch=4, command_type=None, **kwargs):
+        """Execute the list command, and yield an (item, details) tuple for each item in the list.
+        The details are retrieved with the get command (by default, the get command that matches the list
+        command), using the item ID for the last path argument. Up to "prefetch" details are downloaded in
+        the background, ahead of the caller.
+        Any additional arguments (e.g. filters) are passed to the list command.
         """
-        if response.text != "":
-            # The error details should be a dictionary.
+        items = self.perform(list_command_name, *args, command_type=command_type, **kwargs) or []
+
+        if get_command_name:
+            commands = self.commands.get(get_command_name)
+            if not commands:
+                raise Exception("The command '" + get_command_name + "' is not valid.")
+
+            get_command = commands[command_type] if command_type in commands else list(commands.values())[0]
+        else:
+            list_command = self.commands[list_command_name][command_type or list(self.commands[list_command_name].keys())[0]]
+            get_command = list_command.get_command()
+            if not get_command:
+                raise Exception("Unable to determine the get command for '" + list_command_name + "'. Use the get_command_name argument.")
+
+        id_argument = re.findall("{(.+?)}", get_command.path)[-1]
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, prefetch))
+        pending = collections.deque()
+        try:
+            items = iter(items)
+            for item in items:
+                pending.append((item, executor.submit(get_command.perform, **{id_argument: item["id"]})))
+                if len(pending) >= max(1, prefetch):
+                    break
+
+            while pending:
+                item, future = pending.popleft()
+
+                # Keep the prefetch queue full while the caller processes this item.
+                for next_item in items:
+                    pending.append((next_item, executor.submit(get_command.perform, **{id_argument: next_item["id"]})))
+                    break
+
+                yield item, future.result()
+        finally:
+            # The caller may stop early. Don't download anything else.
+            for item, future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def traffic_mix_defaults(self):
+        """Return a dictionary of the built-in traffic mix protocols ("trafficMixesDefaults"), keyed by name.
+        The protocols are only downloaded the first time this method is called.
+        """
+        with self._traffic_mix_lock:
+            if self._traffic_mix_defaults is None:
+                self._traffic_mix_defaults = {protocol["name"]: protocol for protocol in self.perform("trafficMixesDefaults")}
+
+        return self._traffic_mix_defaults
+
+    def find_queue_for_ports(self, locations, require_all=True):
+        """Return the queue (as returned by "getQueue") that contains the specified port locations.
+        e.g. cf.find_queue_for_ports(["10.141.49.19/1/1", "10.141.49.19/1/2"])
+
+        By default, every port must belong to the queue. When require_all is False, the first queue
+        that contains any of the ports is returned. Returns None if there is no matching queue.
+        """
+        return self.queue_index.find(locations, require_all=require_all)
+
+    def _perform_cached(self, command, *args, **kwargs):
+        """Execute a test run result command, using the result cache whenever possible.
+        """
+        # The filters (and any other query arguments) change the response, so they are part of the cache key.
+        path_arguments = re.findall("{(.+?)}", command.path)
+        query = {key: value for key, value in kwargs.items() if key not in path_arguments}
+
+        if args or (query and command.name == "getTestRunResult"):
+            return command.perform(*args, **kwargs)
+
+        if command.name == "getTestRunResult":
+            result_id = kwargs.get("testRunResultsId")
+            result = self.result_cache.get(result_id)
+            if result is None:
+                result = command.perform(*args, **kwargs)
+                self.result_cache.put(result_id, result)
+        else:
+            run_id = kwargs.get("testRunId")
+            if run_id and query:
+                run_id = str(run_id) + "?" + json.dumps(query, sort_keys=True, default=str)
+
+            result = self.result_cache.get_list(run_id)
+            if result is None:
+                result = command.perform(*args, **kwargs)
+                self.result_cache.put_list(run_id, result)
+
+        return result
+
+    def exec(self, httpverb, url, *args, filters=None, upload_filename=None, **kwargs):
+        """Send the specified HTTP request to the CyberFlood ReST API.
+        The filter argument is special. It is a dictionary of filters that must be added to the URL.
+
+        Use the "upload_filename" argument to upload files to the server.
+        """
+        if self.tracer is None:
+            return self._exec_with_metrics(httpverb, url, args, kwargs, filters, upload_filename)
+
+        command_name, tag = self._current_command(httpverb)
+        with self.tracer.span("exec", command=command_name, tag=tag, method=httpverb.upper(), path=url):
+            return self._exec_with_metrics(httpverb, url, args, kwargs, filters, upload_filename)
+
+    def _current_command(self, httpverb):
+        """Return the name and tag of the perform command executing the current request.
+        Requests made with the HTTP verb methods use the verb as the name.
+        """
+        command = getattr(_command_context, "command", None)
+        if command:
+            return command.name, command.tag
+
+        return httpverb.upper(), ""
+
+    def _span(self, name, **attributes):
+        """Return a tracing span context manager, or a context manager that does nothing when tracing is off.
+        """
+        if self.tracer is None:
+            return _NO_SPAN
+
+        return self.tracer.span(name, **attributes)
+
+    def _exec_with_metrics(self, httpverb, url, args, kwargs, filters, upload_filename):
+        registry = self.metrics_registry
+        profiler = self._profiler
+        if registry is None and profiler is None:
+            return self._exec(httpverb, url, args, kwargs, filters, upload_filename, None)
+
+        command_name, tag = self._current_command(httpverb)
+
+        stats = {"status": None, "request_bytes": 0, "response_bytes": 0}
+        error = True
+        start = time.perf_counter()
+        try:
+            return_value = self._exec(httpverb, url, args, kwargs, filters, upload_filename, stats)
+            error = False
+        finally:
+            elapsed = time.perf_counter() - start
+
+            if registry is not None:
+                registry.record(command_name, tag, elapsed, stats["status"], stats["request_bytes"], stats["response_bytes"], error,
+                                stats.get("throttled_seconds", 0.0))
+            if profiler is not None:
+                profiler.add_request(command_name, tag, httpverb, url, elapsed, stats, error)
+
+        return return_value
+
+    def health(self):
+        """Return the health of the controller, as tracked by the circuit breaker.
+        Without a circuit breaker, the controller is always reported as available.
+        """
+        if self.circuit_breaker is None:
+            return {"state": "closed", "available": True}
+
+        return self.circuit_breaker.health()
+
+    def limit_requests(self, rate=None, burst=None, max_in_flight=None, tag=None):
+        """Limit the requests sent to the controller to "rate" per second (with bursts of up to "burst"),
+        and "max_in_flight" concurrent requests. When a tag is specified, the limits only apply to the
+        commands for that object type (in addition to the controller limits).
+        Use None for rate and max_in_flight to remove the limits.
+        Returns the RequestGovernor.
+        """
+        if self.governor is None:
+            self.governor = RequestGovernor()
+
+        self.governor.set_limit(rate, burst, max_in_flight, tag)
+
+        return self.governor
+
+    def profile(self, sort="cumulative"):
+        """Return a context manager that profiles the client while it is active.
+        e.g. with cf.profile() as p:
+                 ...
+             print(p.report())
+        """
+        return Profile(self, sort=sort)
+
+    def enable_metrics(self, enabled=True):
+        """Start (or stop) collecting request metrics. Existing metrics are kept when re-enabled.
+        """
+        if enabled:
+            if self.metrics_registry is None:
+                self.metrics_registry = self._stopped_metrics_registry or MetricsRegistry()
+        else:
+            self._stopped_metrics_registry = self.metrics_registry or self._stopped_metrics_registry
+            self.metrics_registry = None
+
+    def metrics(self, format=None):
+        """Return the request metrics collected so far, as a list of dictionaries (one per command).
+        Use format="prometheus" to return the metrics in the Prometheus text exposition format.
+        """
+        registry = self.metrics_registry or self._stopped_metrics_registry or MetricsRegistry()
+
+        if format == "prometheus":
+            return registry.to_prometheus()
+
+        return registry.snapshot()
+
+    def _exec(self, httpverb, url, args, kwargs, filters, upload_filename, stats):
+        """The implementation of exec(). When stats is a dictionary, the status code and the
+        request/response sizes are saved in it.
+        """
+        httpverb = httpverb.lower()
+
+        start = time.perf_counter()
+        with self._span("encode"):
+            url, payload, json_payload = self._encode(url, args, kwargs, filters)
+
+        if stats is not None:
+            stats["request_bytes"] = os.path.getsize(upload_filename) if upload_filename else len((json_payload or "").encode("utf-8"))
+            stats["encode_seconds"] = time.perf_counter() - start
+
+            # The connect/TLS times are added to stats by the connection timers (see Profile).
+            _connection_timing.stats = stats
+
+        governor = self.governor
+        breaker = self.circuit_breaker
+        try:
+            if breaker is not None:
+                breaker.before_request()
+
+            with _NO_SPAN if governor is None else governor.slot(self._current_command(httpverb)[1]) as throttled:
+                start = time.perf_counter()
+                with self._span("http", method=httpverb.upper(), url=url):
+                    response = self._send(httpverb, url, payload, json_payload, upload_filename)
+        except BaseException as e:
+            if breaker is not None and not isinstance(e, CircuitOpenError):
+                breaker.record_exception(e)
+            raise
+        finally:
+            _connection_timing.stats = None
+
+        if breaker is not None:
+            breaker.record_response(response)
+
+        if stats is not None:
+            stats["throttled_seconds"] = throttled or 0.0
+
+        if stats is not None:
+            stats["status"] = response.status_code
+            stats["send_seconds"] = time.perf_counter() - start
+            # The time from sending the request until the response headers were parsed.
+            stats["ttfb_seconds"] = response.elapsed.total_seconds() if response.elapsed else 0.0
+
+        if not response.ok:
+            self._process_error(response)
+
+        start = time.perf_counter()
+        with self._span("decode"):
+            return_value = self._decode(response, url)
+
+        if stats is not None:
+            stats["decode_seconds"] = time.perf_counter() - start
+
+            if isinstance(return_value, str) and os.path.isfile(return_value):
+                stats["response_bytes"] = os.path.getsize(return_value)
+            else:
+                stats["response_bytes"] = len(response.content or b"")
+
+        return return_value
+
+    def _encode(self, url, args, kwargs, filters):
+        """Return the complete URL, the payload dictionary and the JSON payload for a request.
+        """
+        # Construct the complete URL.
+        url = self.controller_address + url
+        url += self._add_filters(filters)
+
+        # Construct the json_payload, which can be a combination of args and kwargs.
+        payload = {}
+        json_payload = {}
+
+        if args:
+            # Only one positional arg is supported, and it must be a dictionary.
+            payload = args[0]
+
+        # Merge the kwargs into the payload dictionary.
+        deepupdate(payload, kwargs)
+
+        if len(list(payload.keys())) > 0:
+            json_payload = json.dumps(payload)
+
+        return url, payload, json_payload
+
+    def _cassette_send(self, httpverb, url, body, send):
+        """Call send() to send a request, recording the response when a cassette is recording.
+        When a cassette is replaying, the recorded response is returned instead.
+        """
+        if self.cassette is None:
+            return send()
+
+        return self.cassette.play(httpverb, url[len(self.controller_address):] if url.startswith(self.controller_address) else url, body, send)
+
+    def _send(self, httpverb, url, payload, json_payload, upload_filename):
+        """Send the HTTP request, and return the response.
+        """
+        if self.cassette is not None:
+            body = "file:" + os.path.basename(upload_filename) if upload_filename else (json_payload or None)
+            return self._cassette_send(httpverb, url, body, lambda: self._send_request(httpverb, url, payload, json_payload, upload_filename))
+
+        return self._send_request(httpverb, url, payload, json_payload, upload_filename)
+
+    def _send_request(self, httpverb, url, payload, json_payload, upload_filename):
+        if upload_filename:
+            filedata = open(upload_filename, "rb")
+            filejson = {"file": filedata}
+            response = self.__session.post(url, files=filejson, data=payload, verify=False, timeout=self.timeout)
+
+        elif httpverb == "get":
+            response = self.__session.get(url, data=json_payload, headers={'Content-Type': 'application/json'}, verify=False, timeout=self.timeout)
+        elif httpverb == "post":
+            response = self.__session.post(url, data=json_payload, headers={'Content-Type': 'application/json'}, verify=False, timeout=self.timeout)
+        elif httpverb == "put":
+            response = self.__session.put(url, data=json_payload, headers={'Content-Type': 'application/json'}, verify=False, timeout=self.timeout)
+        elif httpverb == "delete":
+            response = self.__session.delete(url, timeout=self.timeout)
+        else:
+            raise Exception("ERROR: The command '" + httpverb + "' is not valid.")
+
+        return response
+
+    def _decode(self, response, url):
+        """Convert the response into the value returned by exec(). Attachments are saved to disk.
+        """
+        return_value = None
+
+        # print("HERE")
+        # import pprint
+        # pp = pprint.PrettyPrinter(indent=2)
+        # # pp.pprint(response.url)
+        # pp.pprint(response.status_code)
+        # # pp.pprint(response.encoding)
+        # pp.pprint(response.headers)
+        # pp.pprint(response)
+        # pp.pprint("Content=")
+        # print(response.content)
+
+        # print("======")
+        # print("Text:")
+        # print(response.text)
+
+        # Process the response.
+        content_disposition = response.headers.get("content-disposition")
+
+        if response.status_code == 204:
+            # This happens with DELETE.
+            return_value = None
+        elif response.headers.get("content-type") == "application/json":
+            return_value = response.json()
+        elif content_disposition and re.match("attachment", content_disposition, flags=re.I):
+            # The response contained an attachment.
+            # The content-disposition will look something like this: attachment; filename="event.log"
+            match = re.search("filename=\"(.+)\"", content_disposition, flags=re.I)
+            filename = match.group(1)
+            return_value = self._save_file(response, filename)
+        elif response.headers.get("content-type") == "application/octet-stream":
+            # This is probably a file as well. The last part of the URL should be the filename.
+            # e.g. "https://1.1.1.1/api/v2/documentation/openapi.yaml"
+            if url.find('/'):
+                # Extract the filename from the URL.
+                filename = url.rsplit('/', 1)[1]
+            else:
+                filename = "unknown_file"
+
+            return_value = self._save_file(response, filename)
+        else:
+            # Whoops...looks like we got a response that wasn't anticipated.
+            LOGGER.debug(str(response.headers.get))
+            raise Exception("ERROR: Unknown response type (" + str(response.headers.get("content-type")) + ").")
+
+        return return_value
+
+    def _stream(self, url):
+        """Send a GET request and return the response without downloading the body.
+        The caller is responsible for closing the response.
+        """
+        url = self.controller_address + url
+        governor = self.governor
+        breaker = self.circuit_breaker
+        if breaker is not None:
+            breaker.before_request()
+
+        try:
+            with _NO_SPAN if governor is None else governor.slot(self._current_command("get")[1]):
+                response = self._cassette_send("get", url, None,
+                                               lambda: self.__session.get(url, headers={'Content-Type': 'application/json'}, verify=False, stream=True, timeout=self.timeout))
+        except BaseException as e:
+            if breaker is not None:
+                breaker.record_exception(e)
+            raise
+
+        if breaker is not None:
+            breaker.record_response(response)
+
+        if not response.ok:
+            self._process_error(response)
+
+        return response
+
+    def _save_file(self, response, filename, directory=None):
+        """ Save a file attachment from a response to the current directory (or possibly a subdirectory).
+        """
+
+        if directory:
+            filename = os.path.join(directory, filename)
+
+        filename = os.path.abspath(filename)
+        path = os.path.dirname(filename)
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        try:
+            with self._span("save_file", filename=filename), open(filename, 'wb') as f:
+                for buff in response.iter_content(chunk_size=16384):
+                    f.write(buff)
+        except Exception as e:
+            raise RuntimeError("Could not download file: " + str(e))
+        finally:
+            response.close()
+
+        return filename
+
+    def _add_filters(self, filters):
+        """Convert any filters, specified as a dictionary by the user, into a string for a URL.
+        """
+        filtersurl = ""
+        if filters:
+            # The user may specify a multi-key filter with a "dash" delimiter.
+            # e.g. duration-lt translates to filter[duration][lt].
+
+            for key in filters.keys():
+                if filtersurl != "":
+                    filtersurl += "&"
+
+                filtersurl += "filter"
+                for subfilter in key.split("-"):
+                    filtersurl += "[" + subfilter + "]"
+
+                #  value = requests.utils.quote(filters[key])
+                value = filters[key]
+                filtersurl += "=" + str(value)
+
+            filtersurl = "?" + filtersurl
+
+        return filtersurl
+
+    def _process_error(self, response):
+        """Handle error responses from the CyberFlood ReST API.
+        """
+        if response.text != "":
+            # The error details should be a dictionary.
             # e.g.
             # {"type":"validation",
             #  "message":"Validation failed, config subnets client vlans id must be an integer",
@@ -529,7 +1852,7 @@ class CyberFlood:
 
             if os.path.isfile(cached_commands_filename):
                 # Okay, the file exists, so load the cached api_spec dictionary.
-                with open(cached_commands_filename) as f:
+                with self._span("load_cached_spec"), open(cached_commands_filename) as f:
                     api_spec = json.load(f)
             else:
                 # The cached commands were not found. This means we'll need to attempt to download the OpenAPI.yaml file.
@@ -549,7 +1872,8 @@ class CyberFlood:
             if os.path.isfile(spec_filename):
                 # print("DEBUG ONLY!!!!!!")
                 # print("Start=", datetime.datetime.now().strftime("%H:%M:%S"))
-                api_spec = self._convert_yaml_to_dict(spec_filename)
+                with self._span("parse_spec"):
+                    api_spec = self._convert_yaml_to_dict(spec_filename)
                 # print("Generate=", datetime.datetime.now().strftime("%H:%M:%S"))
 
                 if use_cached_commands:
@@ -563,7 +1887,8 @@ class CyberFlood:
                 raise Exception(errmsg)
 
         if api_spec:
-            self._generate_classes(api_spec)
+            with self._span("generate_classes"):
+                self._generate_classes(api_spec)
         else:
             errmsg = "Unable to obtain the CyberFlood API specification. Try disabling perform_commands."
             LOGGER.error(errmsg)
@@ -672,6 +1997,37 @@ class CfCommand:
 
     @logging_decorator
     def perform(self, *args, **kwargs):
+        resolvedpath = self.resolve_path(kwargs)
+
+        if self.cf.metrics_registry is None and self.cf.tracer is None and self.cf._profiler is None and self.cf.governor is None:
+            return self.cf.exec(self.httpverb, resolvedpath, *args, **kwargs)
+
+        # Let exec() know which command is executing, so that the metrics and spans are grouped by command.
+        previous = getattr(_command_context, "command", None)
+        _command_context.command = self
+        try:
+            with self.cf._span("perform", command=self.name, tag=self.tag):
+                result = self.cf.exec(self.httpverb, resolvedpath, *args, **kwargs)
+        finally:
+            _command_context.command = previous
+
+        return result
+
+    def get_command(self):
+        """Return the "get" command that retrieves a single item from this "list" command, or None.
+        The get command is the GET on this command's path with one additional path argument.
+        e.g. listIpv4Subnets (/subnets/ipv4) -> getIpv4Subnet (/subnets/ipv4/{profileId})
+        """
+        for command in self.cf.object_types.get(self.tag, {}).values():
+            if command.httpverb == "get" and re.fullmatch(re.escape(self.path.rstrip("/")) + "/{[^/]+}", command.path):
+                return command
+
+        return None
+
+    def resolve_path(self, kwargs):
+        """Return the path for this command, with each path argument replaced by its value from kwargs.
+        The path arguments are removed from kwargs, so that they don't get added to the HTTP payload.
+        """
         # Generate the resolvedpath by replacing the path argument names with
         # the user-specified values for each argument.
         # All arguments found in the path are required.
@@ -689,6 +2045,1959 @@ class CfCommand:
             # Remove this key, so that it doesn't get added to the HTTP payload.
             kwargs.pop(key)
 
-        result = self.cf.exec(self.httpverb, resolvedpath, *args, **kwargs)
+        return resolvedpath
 
-        return result
+
+# =============================================================================
+class TestRunResult:
+    """This class wraps a test run result (e.g. from "getTestRunResult") and provides fast access
+    to the time series found in the "raw" section.
+
+    Each series arrives as a list of [time, value] pairs, e.g.
+        result["raw"]["Connections"]["Successful Transactions/Second"] = [[0, 0], [4, 3241], [8, 3237], ...]
+    Most series are in a section (e.g. "Connections"), but some are stored directly in "raw". Use None as
+    the name for these, e.g. result.series("Received Attack/Malware Traffic").
+    Lists of pairs that don't have a numeric time (e.g. "Protocol Throughput", which is keyed by protocol)
+    are not series.
+
+    The first time a series is accessed, it is converted into two contiguous NumPy arrays (times and values).
+    Series in the same section that share their timestamps also share a single time array.
+    Values are int64 when every sample is an integer, otherwise float64 (missing samples become NaN).
+    """
+    def __init__(self, result):
+        if numpy is None:
+            raise Exception("The TestRunResult class requires NumPy. Install it with 'pip install numpy'.")
+
+        self.result = result
+        self.raw = result.get("raw", {}) or {}
+
+        # Converted series, keyed by (section, name).
+        self._series = {}
+        # The time axes for each section, used to share identical time arrays between series.
+        self._time_axes = {}
+
+    def __getitem__(self, key):
+        return self.result[key]
+
+    def get(self, key, default=None):
+        return self.result.get(key, default)
+
+    @property
+    def summary(self):
+        return self.raw.get("Summary", {})
+
+    def sections(self):
+        """Return the names of the sections in "raw" that contain time series (e.g. "Connections").
+        """
+        return [name for name, section in self.raw.items() if isinstance(section, dict) and self.series_names(name)]
+
+    def series_names(self, section=None):
+        """Return the names of the time series found in the specified section.
+        When section is None, the names of the series stored directly in "raw" are returned.
+        """
+        container = self.raw if section is None else self.raw.get(section)
+        if not isinstance(container, dict):
+            return []
+
+        return [name for name, series in container.items() if self.is_series(series)]
+
+    @staticmethod
+    def is_series(series):
+        """Return True if the value is a time series: a list of [time, value] pairs with numeric times.
+        """
+        if not isinstance(series, list):
+            return False
+
+        for point in series:
+            if not (isinstance(point, (list, tuple)) and len(point) == 2):
+                return False
+            if not isinstance(point[0], (int, float)) or isinstance(point[0], bool):
+                return False
+
+        return True
+
+    @staticmethod
+    def number(value):
+        """Return the value as a float, or None if it isn't numeric. Some values are numeric strings (e.g. '19.55').
+        """
+        if isinstance(value, bool) or value is None:
+            return None
+
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def protocol_metrics(self):
+        """Return the per-protocol values from "Protocol Data" and "Protocol Throughput", keyed by "<section>/<column>".
+        e.g. {"Protocol Data/Attempted Connections": {"CUD-YouTube": 4068.0, ...},
+              "Protocol Throughput/Incoming": {"CUD-YouTube": 0.0, ...}}
+        Values that aren't numeric (e.g. the IP ranges) are skipped.
+        """
+        metrics = {}
+
+        # Each row is keyed by the protocol name, so the first header ("Protocol Name") has no value in the row.
+        table = self.raw.get("Protocol Data")
+        if isinstance(table, dict):
+            headers = table.get("_headers") or []
+            for protocol, row in table.items():
+                if protocol == "_headers" or not isinstance(row, list) or len(row) > len(headers):
+                    continue
+
+                for header, value in zip(headers[len(headers) - len(row):], row):
+                    value = self.number(value)
+                    if value is not None:
+                        metrics.setdefault("Protocol Data/" + header, {})[protocol] = value
+
+        # Each series is a list of [protocol, value] pairs.
+        throughput = self.raw.get("Protocol Throughput")
+        if isinstance(throughput, dict):
+            for name, pairs in throughput.items():
+                if not isinstance(pairs, list):
+                    continue
+
+                for pair in pairs:
+                    if isinstance(pair, (list, tuple)) and len(pair) == 2 and isinstance(pair[0], str):
+                        value = self.number(pair[1])
+                        if value is not None:
+                            metrics.setdefault("Protocol Throughput/" + name, {})[pair[0]] = value
+
+        return metrics
+
+    def series(self, section, name=None):
+        """Return the (times, values) NumPy arrays for the specified series.
+        Use section="<series>", name=None for a series stored directly in "raw".
+        """
+        key = (section, name)
+        if key not in self._series:
+            container = self.raw if name is None else self.raw.get(section)
+            points = container.get(section if name is None else name) if isinstance(container, dict) else None
+
+            if not self.is_series(points):
+                raise Exception("The series '" + section + ("/" + name if name is not None else "") + "' is not in the test run result.")
+
+            self._series[key] = self._convert_series(section if name is not None else None, points)
+
+        return self._series[key]
+
+    def times(self, section, name=None):
+        return self.series(section, name)[0]
+
+    def values(self, section, name=None):
+        return self.series(section, name)[1]
+
+    def min(self, section, name=None):
+        return self._reduce(numpy.nanmin, section, name)
+
+    def max(self, section, name=None):
+        return self._reduce(numpy.nanmax, section, name)
+
+    def mean(self, section, name=None):
+        return self._reduce(numpy.nanmean, section, name)
+
+    def percentile(self, section, name=None, *, q=50):
+        """Return the q-th percentile (0-100) of the series. q may also be a list of percentiles.
+        """
+        values = self.values(section, name)
+        if values.size == 0:
+            return None
+
+        return numpy.nanpercentile(values, q)
+
+    def _reduce(self, function, section, name):
+        values = self.values(section, name)
+        if values.size == 0:
+            return None
+
+        return function(values).item()
+
+    def _convert_series(self, section, points):
+        """Convert a list of [time, value] pairs into a pair of NumPy arrays.
+        """
+        times = numpy.fromiter((point[0] for point in points), dtype=numpy.float64, count=len(points))
+        if numpy.array_equal(times, numpy.trunc(times)):
+            times = times.astype(numpy.int64)
+
+        # Reuse the time axis of another series in this section, if the timestamps are identical.
+        for axis in self._time_axes.get(section, []):
+            if axis.dtype == times.dtype and numpy.array_equal(axis, times):
+                times = axis
+                break
+        else:
+            times.flags.writeable = False
+            self._time_axes.setdefault(section, []).append(times)
+
+        raw_values = [point[1] for point in points]
+        if all(isinstance(value, int) and not isinstance(value, bool) for value in raw_values):
+            values = numpy.array(raw_values, dtype=numpy.int64)
+        else:
+            values = numpy.array([self.number(value) for value in raw_values], dtype=numpy.float64)
+
+        values.flags.writeable = False
+
+        return times, values
+
+
+# =============================================================================
+class ResultExporter:
+    """This class exports the test run results for one or more tests to Parquet files.
+
+    Results are downloaded concurrently, and each result is written to disk as soon as it arrives, so the
+    memory usage does not grow with the number of results being exported.
+    Two Hive-style partitioned datasets are created in the output directory:
+        summary/testId=<id>/<resultId>.parquet  - One row per result. Each "raw.Summary" entry is a column.
+                                                   Numeric entries are float64, and the others are strings.
+        series/testId=<id>/<resultId>.parquet   - The "raw" time series in long format:
+                                                   (resultId, section, series, time, value)
+                                                   The section is null for series stored directly in "raw".
+    The testId column comes from the partition directory.
+    Both datasets can be read back with pyarrow.parquet.read_table(path) or pandas.read_parquet(path).
+    """
+    def __init__(self, cyberfloodobject, output_path, max_workers=8):
+        if pyarrow is None:
+            raise Exception("The ResultExporter class requires PyArrow. Install it with 'pip install pyarrow'.")
+
+        self.cf = cyberfloodobject
+        self.output_path = os.path.abspath(output_path)
+        self.max_workers = max_workers
+
+    def export(self, test_ids):
+        """Export the results for each of the specified tests. Returns a list of the files that were written.
+        """
+        files = []
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # First, determine which results exist for each test.
+            result_lists = executor.map(lambda test_id: self.cf.perform("listTestResults", testId=test_id), test_ids)
+
+            pending = collections.deque()
+            for test_id, result_list in zip(test_ids, result_lists):
+                for result in result_list:
+                    pending.append((test_id, result))
+
+            LOGGER.info("Exporting %d test results to %s", len(pending), self.output_path)
+
+            # Only keep a limited number of downloads in flight, so that memory stays flat.
+            in_flight = set()
+            while pending or in_flight:
+                while pending and len(in_flight) < self.max_workers * 2:
+                    test_id, result = pending.popleft()
+                    in_flight.add(executor.submit(self._download, test_id, result))
+
+                done, in_flight = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    test_id, result = future.result()
+                    files.extend(self._write_result(test_id, result))
+
+        return files
+
+    def _download(self, test_id, result):
+        """Return the complete result. The result list may not include the "raw" section.
+        """
+        if "raw" not in result and result.get("testRunId"):
+            result = self.cf.perform("getTestRunResult", testRunId=result["testRunId"], testRunResultsId=result["id"])
+
+        return test_id, result
+
+    def _write_result(self, test_id, result):
+        result_id = str(result.get("id", "unknown"))
+        raw = result.get("raw", {}) or {}
+
+        files = []
+
+        # Each file uses the same types for the same entries, so that the files can be read as one dataset.
+        summary = {"resultId": result_id, "testRunId": result.get("testRunId")}
+        fields = [("resultId", pyarrow.string()), ("testRunId", pyarrow.string())]
+        for key, value in raw.get("Summary", {}).items():
+            if value is None or isinstance(value, (dict, list)) or key in summary:
+                continue
+
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                summary[key] = float(value)
+                fields.append((key, pyarrow.float64()))
+            else:
+                summary[key] = str(value)
+                fields.append((key, pyarrow.string()))
+
+        files.append(self._write_table("summary", test_id, result_id, pyarrow.Table.from_pylist([summary], schema=pyarrow.schema(fields))))
+
+        columns = {"resultId": [], "section": [], "series": [], "time": [], "value": []}
+
+        def add_series(section_name, series_name, series):
+            for time_value, value in series:
+                columns["resultId"].append(result_id)
+                columns["section"].append(section_name)
+                columns["series"].append(series_name)
+                columns["time"].append(float(time_value))
+                columns["value"].append(TestRunResult.number(value))
+
+        for section_name, section in raw.items():
+            if TestRunResult.is_series(section):
+                add_series(None, section_name, section)
+            elif isinstance(section, dict):
+                for series_name, series in section.items():
+                    # Skip the lists that aren't time series (e.g. "Protocol Throughput" is keyed by protocol).
+                    if TestRunResult.is_series(series):
+                        add_series(section_name, series_name, series)
+
+        schema = pyarrow.schema([("resultId", pyarrow.string()),
+                                 ("section", pyarrow.string()),
+                                 ("series", pyarrow.string()),
+                                 ("time", pyarrow.float64()),
+                                 ("value", pyarrow.float64())])
+        files.append(self._write_table("series", test_id, result_id, pyarrow.Table.from_pydict(columns, schema=schema)))
+
+        return files
+
+    def _write_table(self, dataset, test_id, result_id, table):
+        path = os.path.join(self.output_path, dataset, "testId=" + str(test_id))
+
+        if not os.path.exists(path):
+            os.makedirs(path, exist_ok=True)
+
+        filename = os.path.join(path, result_id + ".parquet")
+        pyarrow.parquet.write_table(table, filename)
+
+        return filename
+
+
+# =============================================================================
+class ResultCache:
+    """An on-disk cache for completed test run results.
+
+    Each entry is stored as a gzip-compressed JSON file. The filename is a hash of the controller address and
+    the test run result ID (or the test run ID and the query arguments, such as filters, for result lists),
+    so the same directory can be shared by more than one controller.
+    Results are immutable once the test run has completed, so entries never expire.
+    """
+    # These are the perform commands that are able to use the cache.
+    commands = ("getTestRunResult", "listTestRunResults")
+
+    # Only results with one of these (final) statuses are cached. Any other status may still change.
+    complete_statuses = ("completed", "stopped", "failed", "aborted")
+
+    def __init__(self, path, controller_address):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.controller_address = controller_address
+
+        if not os.path.exists(self.path):
+            os.makedirs(self.path, exist_ok=True)
+
+    def get(self, result_id):
+        return self._load("result", result_id)
+
+    def put(self, result_id, result):
+        if result_id and self.is_complete(result):
+            self._save("result", result_id, result)
+
+    def get_list(self, run_id):
+        return self._load("list", run_id)
+
+    def put_list(self, run_id, results):
+        # The list is only cached once every result in it is complete. Each result is also cached individually.
+        if run_id and results and all(self.is_complete(result) for result in results):
+            for result in results:
+                self.put(result.get("id"), result)
+
+            self._save("list", run_id, results)
+
+    @classmethod
+    def is_complete(cls, result):
+        if not isinstance(result, dict):
+            return False
+
+        status = result.get("status")
+        if status:
+            return str(status).lower() in cls.complete_statuses
+
+        # Some results don't include a status. Fall back to the time the test finished.
+        summary = (result.get("raw") or {}).get("Summary") or {}
+        return bool(summary.get("Finished At"))
+
+    def _filename(self, kind, key):
+        digest = hashlib.sha256((self.controller_address + "|" + kind + "|" + str(key)).encode("utf-8")).hexdigest()
+        return os.path.join(self.path, digest + ".json.gz")
+
+    def _load(self, kind, key):
+        if not key:
+            return None
+
+        filename = self._filename(kind, key)
+        if not os.path.isfile(filename):
+            return None
+
+        try:
+            with gzip.open(filename, "rt", encoding="utf-8") as f:
+                LOGGER.debug("Using the cached %s %s", kind, key)
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            LOGGER.warning("Ignoring the corrupt result cache file %s: %s", filename, str(e))
+            return None
+
+    def _save(self, kind, key, value):
+        filename = self._filename(kind, key)
+
+        # Write to a temporary file first, so that other processes never see a partially written entry.
+        fd, tempname = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw_file:
+                with gzip.GzipFile(fileobj=raw_file, mode="wb") as f:
+                    f.write(json.dumps(value).encode("utf-8"))
+            os.replace(tempname, filename)
+        except Exception:
+            os.remove(tempname)
+            raise
+
+
+# =============================================================================
+class RegressionDetector:
+    """This class flags performance regressions across test runs.
+
+    The baseline results are loaded into a (runs x columns) NumPy array, and the mean and standard deviation
+    of each column are calculated once. Each compared run is then scored against the baseline, all at once:
+        zscore = (value - baseline_mean) / baseline_std
+    A column is flagged when its zscore is beyond the threshold (in the "bad" direction), and the relative
+    change from the baseline mean is at least min_change.
+
+    Metrics are "raw.Summary" entries (e.g. "Average CPS"), time series ("<section>/<series>", using the mean),
+    or per-protocol metrics (e.g. "Protocol Throughput/Incoming", see TestRunResult.protocol_metrics).
+    A per-protocol metric has a column for each protocol found in the baseline, and its regressions include
+    the protocol.
+
+    Results can be test run result dictionaries or TestRunResult objects.
+    """
+    default_metrics = ("Average CPS", "Average TPS", "Average Throughput",
+                       "Protocol Throughput/Incoming", "Protocol Throughput/Outgoing", "Protocol Data/Unsuccessful Connections")
+    default_lower_is_better = ("Protocol Data/Unsuccessful Connections",)
+
+    def __init__(self, baseline_results, metrics=None, lower_is_better=None, threshold=3.0, min_change=0.05):
+        if numpy is None:
+            raise Exception("The RegressionDetector class requires NumPy. Install it with 'pip install numpy'.")
+
+        self.metrics = list(metrics or self.default_metrics)
+        self.threshold = threshold
+        self.min_change = min_change
+
+        if lower_is_better is None:
+            lower_is_better = self.default_lower_is_better
+
+        baseline_results = [self._wrap(result) for result in baseline_results]
+
+        # Each column is a (metric, protocol) pair. The protocol is None for the metrics that aren't per-protocol.
+        protocols = {}
+        for result in baseline_results:
+            for metric, values in result.protocol_metrics().items():
+                protocols.setdefault(metric, set()).update(values)
+
+        self.columns = []
+        for metric in self.metrics:
+            if metric in protocols:
+                self.columns.extend((metric, protocol) for protocol in sorted(protocols[metric]))
+            else:
+                self.columns.append((metric, None))
+
+        # +1 when a higher value is better, -1 when a lower value is better.
+        self.direction = numpy.array([-1.0 if metric in lower_is_better else 1.0 for metric, protocol in self.columns])
+
+        baseline = self.load(baseline_results)
+        if baseline.shape[0] < 2:
+            raise Exception("At least two baseline results are required to detect regressions.")
+
+        self.baseline_mean = numpy.nanmean(baseline, axis=0)
+        self.baseline_std = numpy.nanstd(baseline, axis=0, ddof=1)
+
+    def load(self, results):
+        """Return a (runs x columns) array of the metric values for each result. Missing values are NaN.
+        """
+        matrix = numpy.full((len(results), len(self.columns)), numpy.nan)
+
+        for row, result in enumerate(results):
+            result = self._wrap(result)
+            protocol_metrics = result.protocol_metrics()
+
+            for column, (metric, protocol) in enumerate(self.columns):
+                if protocol is None:
+                    matrix[row, column] = self._metric_value(result, metric)
+                else:
+                    matrix[row, column] = protocol_metrics.get(metric, {}).get(protocol, numpy.nan)
+
+        return matrix
+
+    def scores(self, results):
+        """Return the (runs x columns) array of zscores, oriented so that a negative score is always worse.
+        """
+        return self._scores(self.load(results))
+
+    def _scores(self, values):
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            zscores = (values - self.baseline_mean) / self.baseline_std
+
+            # A constant baseline has no spread. Any change in the bad direction is significant.
+            zscores = numpy.where(self.baseline_std == 0, numpy.sign(values - self.baseline_mean) * numpy.inf, zscores)
+            zscores = numpy.where(numpy.isnan(values), numpy.nan, zscores)
+
+        return zscores * self.direction
+
+    def compare(self, results):
+        """Return a list of the regressions found in the specified results. Each entry is a dictionary.
+        """
+        values = self.load(results)
+        zscores = self._scores(values)
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            change = (values - self.baseline_mean) / numpy.abs(self.baseline_mean)
+
+        flagged = (zscores < -self.threshold) & (change * self.direction <= -self.min_change)
+
+        regressions = []
+        for row, column in zip(*numpy.nonzero(flagged)):
+            result = results[row]
+            metric, protocol = self.columns[column]
+            regressions.append({"resultId": result.get("id"),
+                                "metric": metric,
+                                "protocol": protocol,
+                                "value": values[row, column].item(),
+                                "baseline_mean": self.baseline_mean[column].item(),
+                                "baseline_std": self.baseline_std[column].item(),
+                                "zscore": zscores[row, column].item(),
+                                "change": change[row, column].item()})
+
+        return regressions
+
+    @staticmethod
+    def _wrap(result):
+        return result if isinstance(result, TestRunResult) else TestRunResult(result)
+
+    def _metric_value(self, result, metric):
+        value = result.summary.get(metric)
+
+        # Time series use the mean of the series. Some series are stored directly in "raw", and their
+        # names may contain a "/" (e.g. "Received Attack/Malware Traffic").
+        if value is None and metric in result.series_names():
+            value = result.mean(metric)
+        elif value is None and "/" in metric:
+            section, name = metric.split("/", 1)
+            if name in result.series_names(section):
+                value = result.mean(section, name)
+
+        value = TestRunResult.number(value)
+
+        return numpy.nan if value is None else value
+
+
+# =============================================================================
+class LazyTestRunResult(collections.abc.Mapping):
+    """A read-only test run result that only downloads the parts that are accessed.
+
+    Accessing result["raw"][section] downloads just that section, and keeps it for later use.
+    Accessing any other key (e.g. result["id"]) downloads the complete result once.
+    Use dict(result) to force the complete result to be downloaded.
+    """
+    def __init__(self, cyberfloodobject, command, **kwargs):
+        self.cf = cyberfloodobject
+        self.command = command
+        self.path = command.resolve_path(kwargs)
+
+        self._result = None
+        self._sections = {}
+        self.raw = _LazyRawSections(self)
+
+    def __getitem__(self, key):
+        if key == "raw":
+            return self.raw
+
+        return self._load()[key]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __repr__(self):
+        return "<LazyTestRunResult " + self.path + " sections=" + str(sorted(self._sections.keys())) + ">"
+
+    def _load(self):
+        """Download the complete result, if it hasn't already been downloaded.
+        """
+        if self._result is None:
+            self._result = self.cf.exec(self.command.httpverb, self.path)
+
+            if self.cf.result_cache:
+                self.cf.result_cache.put(self._result.get("id"), self._result)
+
+            self._sections.update(self._result.get("raw") or {})
+
+        return self._result
+
+    def section(self, name):
+        """Return the specified section of "raw", downloading it if necessary.
+        """
+        if name not in self._sections:
+            if "fields" in self.command.query_parameters:
+                # The server can select the section for us.
+                result = self.cf.exec("get", self.path + "?fields=raw." + requests.utils.quote(name))
+                value = (result.get("raw") or {}).get(name, _JsonPathScanner.missing)
+            else:
+                value = self._stream_section(name)
+
+            if value is _JsonPathScanner.missing:
+                raise KeyError(name)
+
+            self._sections[name] = value
+
+        return self._sections[name]
+
+    def _stream_section(self, name):
+        scanner = _JsonPathScanner(("raw", name))
+
+        # The controller doesn't always specify the charset, so decode the bytes here.
+        decoder = codecs.getincrementaldecoder("utf-8")()
+
+        response = self.cf._stream(self.path)
+        try:
+            for chunk in response.iter_content(chunk_size=65536):
+                if scanner.feed(decoder.decode(chunk)):
+                    # Closing the response early stops the rest of the result from being downloaded.
+                    break
+        finally:
+            response.close()
+
+        return scanner.value
+
+
+class _LazyRawSections(collections.abc.Mapping):
+    """The "raw" part of a LazyTestRunResult.
+    """
+    def __init__(self, lazyresult):
+        self.lazyresult = lazyresult
+
+    def __getitem__(self, key):
+        return self.lazyresult.section(key)
+
+    def __iter__(self):
+        return iter(self.lazyresult._load().get("raw") or {})
+
+    def __len__(self):
+        return len(self.lazyresult._load().get("raw") or {})
+
+
+class _JsonPathScanner:
+    """Incrementally scan a JSON document, and decode only the value found at the specified path.
+    e.g. path=("raw", "Summary") decodes document["raw"]["Summary"] and skips everything else.
+
+    Call feed() with each chunk of text. It returns True once the value has been found (or is known
+    to be missing). The value is then available as "value" (or "missing").
+    """
+    missing = object()
+
+    # Strings, punctuation, or scalars (numbers, true, false, null).
+    token = re.compile(r'\s*("(?:[^"\\]|\\.)*"|[{}\[\],:]|[^\s{}\[\],:"]+)')
+
+    def __init__(self, path):
+        self.path = list(path)
+        self.value = self.missing
+        self.done = False
+
+        self.buffer = ""
+        self.pos = 0
+
+        # Each frame is [container, key, expecting_key]. The key is None for arrays.
+        self.stack = []
+        self.key = None
+        self.start = None
+        self.start_depth = None
+
+    def feed(self, text):
+        if self.done:
+            return True
+
+        self.buffer += text
+
+        while not self.done:
+            match = self.token.match(self.buffer, self.pos)
+            if not match or match.end() == len(self.buffer):
+                # The token may continue in the next chunk.
+                break
+
+            token = match.group(1)
+            token_start = match.start(1)
+            self.pos = match.end()
+
+            self._process(token, token_start)
+
+        if self.start is None:
+            # Nothing in the buffer is needed anymore.
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+
+        return self.done
+
+    def _process(self, token, token_start):
+        frame = self.stack[-1] if self.stack else None
+
+        if token in (",", ":"):
+            if token == "," and frame and frame[0] == "{":
+                frame[2] = True
+            return
+
+        if frame and frame[0] == "{" and frame[2]:
+            if token == "}":
+                self._close()
+            else:
+                # This is an object key.
+                frame[1] = json.loads(token)
+                frame[2] = False
+            return
+
+        if token in ("}", "]"):
+            self._close()
+            return
+
+        # This is the start of a value.
+        if self.start is None and self._on_path():
+            self.start = token_start
+            self.start_depth = len(self.stack)
+
+        if token in ("{", "["):
+            self.stack.append([token, None, token == "{"])
+        else:
+            self._value_finished()
+
+    def _on_path(self):
+        keys = [frame[1] for frame in self.stack]
+        return len(keys) == len(self.path) and keys == self.path
+
+    def _close(self):
+        frame = self.stack.pop()
+
+        if self.start is None and frame[0] == "{" and [f[1] for f in self.stack] == self.path[:len(self.stack)]:
+            # An object on the path was closed without finding the next key, so the value is missing.
+            self.done = True
+            return
+
+        self._value_finished()
+
+    def _value_finished(self):
+        if self.start is not None and len(self.stack) == self.start_depth:
+            self.value = json.loads(self.buffer[self.start:self.pos])
+            self.done = True
+        elif not self.stack:
+            # The whole document has been processed.
+            self.done = True
+
+
+# =============================================================================
+class PortIndex:
+    """An in-memory index of every port on the controller, keyed by the port location (systemId).
+    e.g. "10.140.99.10/1/2"
+
+    Building the index lists the devices, and then downloads the details for each device concurrently.
+    Each entry is a dictionary with the port, device and compute group:
+        {"id": <port id>, "systemId": "10.140.99.10/1/2", "port": {...}, "device": {...}, "computeGroup": {...}}
+    """
+    def __init__(self, cyberfloodobject, ttl=None, max_workers=8):
+        self.cf = cyberfloodobject
+        self.ttl = ttl
+        self.max_workers = max_workers
+
+        self.ports = {}
+        self.timestamp = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Rebuild the index from the controller.
+        """
+        devices = self.cf.perform("listDevices")
+        details = concurrent_map(lambda device: self.cf.perform("getDevice", deviceId=device["id"]), devices, self.max_workers)
+
+        ports = {}
+        for device in details:
+            for slot in device.get("slots", []):
+                for cg in slot.get("computeGroups", []):
+                    for port in cg.get("ports", []):
+                        ports[port["systemId"]] = {"id": port["id"],
+                                                   "systemId": port["systemId"],
+                                                   "port": port,
+                                                   "device": device,
+                                                   "computeGroup": cg}
+
+        with self._lock:
+            self.ports = ports
+            self.timestamp = time.monotonic()
+
+        LOGGER.debug("The port index contains %d ports from %d devices.", len(ports), len(details))
+
+    def is_stale(self):
+        if self.timestamp is None:
+            return True
+
+        return self.ttl is not None and time.monotonic() - self.timestamp > self.ttl
+
+    def get(self, location, default=None):
+        """Return the index entry for the specified port location.
+        """
+        if self.is_stale():
+            self.refresh()
+
+        return self.ports.get(location, default)
+
+    def port_id(self, location):
+        """Return the ID for the specified port location (e.g. 10.140.99.10/1/2), or None if it doesn't exist.
+        """
+        entry = self.get(location)
+
+        return entry["id"] if entry else None
+
+    def __contains__(self, location):
+        return self.get(location) is not None
+
+
+# =============================================================================
+class QueueIndex:
+    """An in-memory index of the queues on the controller, keyed by port location (systemId).
+
+    Each lookup lists the queues (one request), but only downloads the details ("getQueue") for the queues
+    that are new or have changed since the last lookup. Deleted queues are removed from the index.
+    Set "ttl" to skip even the list request when the index is younger than "ttl" seconds. The index is
+    invalidated whenever a queue is created, updated or deleted with the perform method.
+    """
+    modifying_commands = ("createQueue", "updateQueue", "deleteQueue")
+
+    def __init__(self, cyberfloodobject, ttl=0, max_workers=8):
+        self.cf = cyberfloodobject
+        self.ttl = ttl
+        self.max_workers = max_workers
+
+        # queue id -> (signature of the list entry, queue details)
+        self.queues = {}
+        # systemId -> list of queue ids.
+        self.ports = {}
+        self.timestamp = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self.timestamp = None
+
+    def refresh(self):
+        """Bring the index up to date with the controller.
+        """
+        listing = self.cf.perform("listQueues")
+
+        with self._lock:
+            current = dict(self.queues)
+
+        signatures = {queue["id"]: json.dumps(queue, sort_keys=True, default=str) for queue in listing}
+        changed = [queue for queue in listing if queue["id"] not in current or current[queue["id"]][0] != signatures[queue["id"]]]
+
+        details = concurrent_map(lambda queue: self.cf.perform("getQueue", queueId=queue["id"]), changed, self.max_workers)
+
+        queues = {queue_id: current[queue_id] for queue_id in signatures if queue_id in current}
+        for queue, info in zip(changed, details):
+            # Non-virtual ports are sometimes only found in the list entry.
+            info.setdefault("ports", queue.get("ports", []))
+            queues[queue["id"]] = (signatures[queue["id"]], info)
+
+        ports = {}
+        for queue_id, (signature, info) in queues.items():
+            for location in self._locations(info):
+                ports.setdefault(location, []).append(queue_id)
+
+        with self._lock:
+            self.queues = queues
+            self.ports = ports
+            self.timestamp = time.monotonic()
+
+        LOGGER.debug("The queue index contains %d queues (%d downloaded).", len(queues), len(changed))
+
+    def find(self, locations, require_all=True):
+        if self.timestamp is None or time.monotonic() - self.timestamp >= self.ttl:
+            self.refresh()
+
+        candidates = None
+        for location in locations:
+            queue_ids = self.ports.get(location, [])
+
+            if not require_all and queue_ids:
+                return self.queues[queue_ids[0]][1]
+
+            if candidates is None:
+                candidates = list(queue_ids)
+            else:
+                candidates = [queue_id for queue_id in candidates if queue_id in queue_ids]
+
+        if require_all and candidates:
+            return self.queues[candidates[0]][1]
+
+        return None
+
+    @staticmethod
+    def _locations(queue):
+        # Non-virtual ports are found under the "ports" key.
+        for port in queue.get("ports", []):
+            yield port["systemId"]
+
+        # Virtual ports are found under the "computeGroups" key.
+        for cg in queue.get("computeGroups", []):
+            for port in cg.get("ports", []):
+                yield port["systemId"]
+
+
+# =============================================================================
+class NameResolver:
+    """Converts object names into IDs, for each CyberFlood object type (e.g. "Subnets", "Queues").
+
+    The first lookup for an object type executes each of the "list" commands for that type (the commands
+    in object_types that start with "list" and don't require any path arguments), and keeps a name/ID map
+    for each list command. All subsequent lookups for that type are answered locally, until the type is
+    invalidated (by a create, update, delete or replicate command for that type).
+    """
+    # Perform commands that start with one of these change the names of an object type.
+    modifying_prefixes = ("create", "update", "delete", "replicate")
+
+    def __init__(self, cyberfloodobject):
+        self.cf = cyberfloodobject
+
+        # object type -> {list command name: {name: id}}
+        self.names = {}
+        self._lock = threading.Lock()
+
+        # Incremented by invalidate(), so that a map that was being built at the time isn't kept.
+        self._generation = 0
+
+    @classmethod
+    def is_modifying(cls, command):
+        return command.httpverb != "get" and command.name.lower().startswith(cls.modifying_prefixes)
+
+    def invalidate(self, object_type=None):
+        """Discard the name/ID map for the specified object type (or all of them).
+        """
+        with self._lock:
+            self._generation += 1
+
+            if object_type is None:
+                self.names = {}
+            else:
+                self.names.pop(object_type, None)
+
+    def resolve(self, object_type, name, list_command=None):
+        return self.resolve_many(object_type, [name], list_command)[0]
+
+    def resolve_many(self, object_type, names, list_command=None):
+        maps = self._load(object_type)
+
+        if list_command is not None:
+            if list_command not in maps:
+                raise Exception("'" + str(list_command) + "' is not a list command for the object type '" + object_type + "'. Use one of: " + ", ".join(sorted(maps)))
+
+            return [maps[list_command].get(name) for name in names]
+
+        ids = []
+        for name in names:
+            # The same object may be returned by more than one list command (e.g. "listTests").
+            matches = {names_map[name] for names_map in maps.values() if name in names_map}
+            if len(matches) > 1:
+                commands = sorted(command for command, names_map in maps.items() if name in names_map)
+                raise Exception("The name '" + str(name) + "' is used by more than one " + object_type + " object (" + ", ".join(commands) + "). Use the list_command argument.")
+
+            ids.append(matches.pop() if matches else None)
+
+        return ids
+
+    def list_objects(self, object_type):
+        """Return a (name, id) tuple for each object of the specified type, from the controller.
+        Unlike resolve, this includes every object when the same name is used more than once.
+        """
+        list_commands = self._list_commands(object_type)
+
+        return [(name, object_id) for command_name, name, object_id in self._list(list_commands)]
+
+    def _list_commands(self, object_type):
+        if object_type not in self.cf.object_types:
+            raise Exception("The object type '" + str(object_type) + "' is not valid.")
+
+        list_commands = [command for name, command in sorted(self.cf.object_types[object_type].items())
+                         if name.startswith("list") and not command.path_parameters]
+
+        if not list_commands:
+            raise Exception("There is no list command for the object type '" + object_type + "'.")
+
+        return list_commands
+
+    @staticmethod
+    def _list(list_commands):
+        objects = []
+        for command in list_commands:
+            for item in command.perform() or []:
+                if isinstance(item, dict) and "name" in item and "id" in item:
+                    objects.append((command.name, item["name"], item["id"]))
+
+        return objects
+
+    def _load(self, object_type):
+        maps = self.names.get(object_type)
+        if maps is not None:
+            return maps
+
+        generation = self._generation
+
+        list_commands = self._list_commands(object_type)
+
+        maps = {command.name: {} for command in list_commands}
+        for command_name, name, object_id in self._list(list_commands):
+            # Keep the first ID if the same name is used more than once by a list command.
+            maps[command_name].setdefault(name, object_id)
+
+        with self._lock:
+            # Don't keep the map if the object type was invalidated while it was being built.
+            if self._generation == generation:
+                self.names[object_type] = maps
+
+        return maps
+
+
+# =============================================================================
+class ObjectMirror:
+    """A local SQLite copy of the objects on the controller.
+
+    Every object type in object_types is mirrored, using each "list" command that doesn't require any path
+    arguments. When the list command has a matching "get" command, the complete object is stored.
+    Each row of the "objects" table contains:
+        object_type  - The object type (tag), e.g. "Subnets".
+        command      - The list command, e.g. "listIpv4Subnets".
+        id, name     - The object ID and name.
+        modified     - The modification timestamp reported by the controller (if any).
+        signature    - Used to detect changes to objects that don't report a modification timestamp.
+        data         - The object, as JSON.
+        synced_at    - The time the object was last downloaded (seconds since the epoch).
+    """
+    # The list entry keys that may contain a modification timestamp.
+    modified_keys = ("updatedAt", "updated_at", "modifiedAt", "modified_at", "lastModified")
+
+    def __init__(self, cyberfloodobject, database_path, max_workers=8):
+        self.cf = cyberfloodobject
+        self.max_workers = max_workers
+        self.database_path = database_path
+
+        self.connection = sqlite3.connect(database_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self.connection:
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS objects (
+                                           object_type TEXT NOT NULL,
+                                           command TEXT NOT NULL,
+                                           id TEXT NOT NULL,
+                                           name TEXT,
+                                           modified TEXT,
+                                           signature TEXT,
+                                           data TEXT NOT NULL,
+                                           synced_at REAL NOT NULL,
+                                           PRIMARY KEY (command, id))""")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS objects_type_name ON objects (object_type, name)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS objects_id ON objects (id)")
+
+    def close(self):
+        self.connection.close()
+
+    def sync(self, object_types=None):
+        """Bring the mirror up to date with the controller. Returns the number of objects downloaded.
+        By default, every object type is synchronized.
+        """
+        downloaded = 0
+        for object_type in object_types or sorted(self.cf.object_types.keys()):
+            for command_name, command in sorted(self.cf.object_types[object_type].items()):
+                if command_name.startswith("list") and command.httpverb == "get" and not command.path_parameters:
+                    downloaded += self._sync_command(object_type, command)
+
+        return downloaded
+
+    def _sync_command(self, object_type, command):
+        try:
+            listing = command.perform()
+        except Exception as e:
+            LOGGER.warning("Unable to synchronize %s (%s): %s", command.name, object_type, str(e))
+            return 0
+
+        items = [item for item in listing or [] if isinstance(item, dict) and "id" in item]
+
+        with self._lock:
+            existing = {row["id"]: row["signature"] for row in
+                        self.connection.execute("SELECT id, signature FROM objects WHERE command = ?", (command.name,))}
+
+        signatures = {str(item["id"]): self._signature(item) for item in items}
+        changed = [item for item in items if existing.get(str(item["id"])) != signatures[str(item["id"])]]
+
+        get_command = command.get_command()
+        if get_command:
+            argument = re.findall("{(.+?)}", get_command.path)[-1]
+            details = concurrent_map(lambda item: self._get_details(get_command, argument, item), changed, self.max_workers)
+        else:
+            details = changed
+
+        now = time.time()
+        rows = [(object_type, command.name, str(item["id"]), item.get("name"), self._modified(item),
+                 signatures[str(item["id"])], json.dumps(detail), now)
+                for item, detail in zip(changed, details)]
+        deleted = [(command.name, object_id) for object_id in existing if object_id not in signatures]
+
+        with self._lock, self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.connection.executemany("DELETE FROM objects WHERE command = ? AND id = ?", deleted)
+
+        LOGGER.debug("Synchronized %s (%s): %d downloaded, %d deleted.", command.name, object_type, len(rows), len(deleted))
+
+        return len(rows)
+
+    def _get_details(self, get_command, argument, item):
+        try:
+            return get_command.perform(**{argument: item["id"]})
+        except Exception as e:
+            # Keep the list entry if the details can't be downloaded.
+            LOGGER.warning("Unable to download %s %s: %s", get_command.name, item["id"], str(e))
+            return item
+
+    def _modified(self, item):
+        for key in self.modified_keys:
+            if item.get(key):
+                return str(item[key])
+
+        return None
+
+    def _signature(self, item):
+        modified = self._modified(item)
+        if modified:
+            return modified
+
+        return hashlib.sha1(json.dumps(item, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def get(self, object_type, object_id):
+        """Return the mirrored object with the specified ID, or None.
+        """
+        with self._lock:
+            row = self.connection.execute("SELECT data FROM objects WHERE object_type = ? AND id = ?", (object_type, str(object_id))).fetchone()
+
+        return json.loads(row["data"]) if row else None
+
+    def find(self, object_type, name=None):
+        """Return a list of the mirrored objects of the specified type, optionally with the specified name.
+        """
+        sql = "SELECT data FROM objects WHERE object_type = ?"
+        parameters = [object_type]
+        if name is not None:
+            sql += " AND name = ?"
+            parameters.append(name)
+
+        return [json.loads(row["data"]) for row in self.query(sql, parameters)]
+
+    def query(self, sql, parameters=()):
+        """Execute an SQL query against the mirror, and return the rows.
+        """
+        with self._lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+
+# =============================================================================
+class Reconciler:
+    """Brings the controller into a desired state.
+
+    The desired state is a list of resources (or a dictionary with a "resources" list). Each resource is:
+        {"kind": "Ipv4Subnet",          # Used to build the command names: list<kind>s, get<kind>, create<kind>, ...
+         "name": "scratch_client",      # Objects are matched by name.
+         "properties": {...},           # The object properties to create or update.
+         "state": "present",            # Optional. "absent" deletes the object.
+         "object_type": "Subnets",      # Optional. The command_type, when a command name is ambiguous.
+         "depends_on": ["Queue/q1"]}    # Optional. Resources ("kind/name") that must be applied first.
+
+    Property values may reference other resources or ports:
+        {"$id": "Ipv4Subnet/scratch_client"}       - The ID of the resource.
+        {"$object": "Ipv4Subnet/scratch_client"}   - The complete resource, as returned by the controller.
+        {"$port": "10.141.49.19/1/1"}              - The ID of the port with this location.
+    References also determine the order: a resource is only applied once everything it refers to exists.
+
+    An existing object is only updated when one of the specified properties is different. Only the
+    properties that changed are sent. Properties that aren't specified are left alone.
+    """
+    def __init__(self, cyberfloodobject, max_workers=8):
+        self.cf = cyberfloodobject
+        self.max_workers = max_workers
+        self.port_index = None
+
+    def plan(self, desired):
+        """Return a list of the actions required to reach the desired state, without applying them.
+        Each action is a dictionary: {"action": "create"|"update"|"delete"|"none", "resource": ..., "id": ...}
+        A resource that refers to an object that doesn't exist yet is always reported as an "update".
+        """
+        return self._plan(self._resources(desired))[0]
+
+    def apply(self, desired):
+        """Apply the desired state. Returns a dictionary with the object for each resource ("kind/name"),
+        or None for deleted resources.
+        """
+        actions, current = self._plan(self._resources(desired))
+
+        present = [action for action in actions if action["resource"].get("state", "present") != "absent"]
+        absent = [action for action in actions if action["resource"].get("state", "present") == "absent"]
+
+        objects = {}
+        for level in self._levels(present):
+            results = concurrent_map(lambda action: self._apply_action(action, current.get(self._key(action["resource"])), objects),
+                                     level, self.max_workers)
+            for action, result in zip(level, results):
+                objects[self._key(action["resource"])] = result
+
+        # Delete in the reverse order, so that objects are deleted before the objects they depend on.
+        for level in reversed(self._levels(absent)):
+            concurrent_map(lambda action: self._delete(action["resource"], current.get(self._key(action["resource"]))), level, self.max_workers)
+            for action in level:
+                objects[self._key(action["resource"])] = None
+
+        return objects
+
+    def _plan(self, resources):
+        """Return the actions, and the current state (the existing object for each resource).
+        """
+        # The port index is built here, rather than by the threads that resolve the references.
+        if self.port_index is None and any(kind == "$port" for resource in resources for kind, target in self._references(resource.get("properties", {}))):
+            self.port_index = PortIndex(self.cf, max_workers=self.max_workers)
+
+        current = self._current_state(resources)
+
+        actions = []
+        for resource in resources:
+            existing = current.get(self._key(resource))
+            action = self._action(resource, existing, current)
+            actions.append({"action": action, "resource": resource, "id": existing["id"] if existing else None})
+
+        return actions, current
+
+    def _resources(self, desired):
+        if isinstance(desired, dict):
+            desired = desired.get("resources", [])
+
+        resources = []
+        keys = set()
+        for resource in desired:
+            if "kind" not in resource or "name" not in resource:
+                raise Exception("Each resource must have a 'kind' and a 'name': " + str(resource))
+
+            key = self._key(resource)
+            if key in keys:
+                raise Exception("The resource '" + key + "' is specified more than once.")
+
+            keys.add(key)
+            resources.append(resource)
+
+        return resources
+
+    @staticmethod
+    def _key(resource):
+        return resource["kind"] + "/" + resource["name"]
+
+    def _perform(self, resource, command_name, *args, **kwargs):
+        return self.cf.perform(command_name, *args, command_type=resource.get("object_type"), **kwargs)
+
+    def _command(self, resource, command_name):
+        commands = self.cf.commands.get(command_name)
+        if not commands:
+            raise Exception("The command '" + command_name + "' is not valid (resource '" + self._key(resource) + "').")
+
+        return commands[resource.get("object_type") or list(commands.keys())[0]]
+
+    def _id_argument(self, resource, command_name):
+        # The object ID is the last path argument. e.g. /subnets/ipv4/{profileId}
+        return re.findall("{(.+?)}", self._command(resource, command_name).path)[-1]
+
+    def _current_state(self, resources):
+        """Download the existing objects for each resource. Each kind is listed once, and then
+        the existing objects are downloaded concurrently.
+        """
+        kinds = {}
+        for resource in resources:
+            kinds.setdefault(resource["kind"], resource)
+
+        listings = concurrent_map(lambda resource: self._perform(resource, "list" + resource["kind"] + "s"),
+                                  list(kinds.values()), self.max_workers)
+
+        ids = {}
+        for kind, listing in zip(kinds.keys(), listings):
+            for item in listing or []:
+                ids.setdefault(kind + "/" + str(item.get("name")), item["id"])
+
+        existing = [resource for resource in resources if self._key(resource) in ids]
+
+        def get_object(resource):
+            if resource.get("state", "present") == "absent":
+                return {"id": ids[self._key(resource)]}
+
+            command_name = "get" + resource["kind"]
+            return self._perform(resource, command_name, **{self._id_argument(resource, command_name): ids[self._key(resource)]})
+
+        objects = concurrent_map(get_object, existing, self.max_workers)
+
+        return {self._key(resource): obj for resource, obj in zip(existing, objects)}
+
+    def _levels(self, actions):
+        """Group the actions into levels. Each resource only depends on resources in earlier levels.
+        """
+        keys = {self._key(action["resource"]) for action in actions}
+        dependencies = {}
+        for action in actions:
+            resource = action["resource"]
+            refs = set(resource.get("depends_on", []))
+            refs.update(ref for kind, ref in self._references(resource.get("properties", {})) if kind != "$port")
+            dependencies[self._key(resource)] = refs & keys
+
+        levels = []
+        done = set()
+        remaining = list(actions)
+        while remaining:
+            level = [action for action in remaining if dependencies[self._key(action["resource"])] <= done]
+            if not level:
+                raise Exception("There is a circular reference between the resources: " + ", ".join(self._key(action["resource"]) for action in remaining))
+
+            levels.append(level)
+            done.update(self._key(action["resource"]) for action in level)
+            remaining = [action for action in remaining if self._key(action["resource"]) not in done]
+
+        return levels
+
+    def _references(self, value):
+        """Return a list of the (kind, target) references found in a property value.
+        """
+        references = []
+        if isinstance(value, dict):
+            if len(value) == 1 and list(value.keys())[0] in ("$id", "$object", "$port"):
+                references.append(list(value.items())[0])
+            else:
+                for item in value.values():
+                    references.extend(self._references(item))
+        elif isinstance(value, list):
+            for item in value:
+                references.extend(self._references(item))
+
+        return references
+
+    def _resolve(self, value, objects):
+        if isinstance(value, dict):
+            if len(value) == 1 and list(value.keys())[0] in ("$id", "$object", "$port"):
+                kind, target = list(value.items())[0]
+
+                if kind == "$port":
+                    port_id = self.port_index.port_id(target)
+                    if port_id is None:
+                        raise Exception("The port '" + target + "' does not exist.")
+
+                    return port_id
+
+                if not objects.get(target):
+                    raise Exception("The referenced resource '" + target + "' does not exist.")
+
+                return objects[target]["id"] if kind == "$id" else objects[target]
+
+            return {key: self._resolve(item, objects) for key, item in value.items()}
+        elif isinstance(value, list):
+            return [self._resolve(item, objects) for item in value]
+
+        return value
+
+    def _action(self, resource, existing, objects):
+        if resource.get("state", "present") == "absent":
+            return "delete" if existing else "none"
+
+        if not existing:
+            return "create"
+
+        try:
+            properties = self._resolve(resource.get("properties", {}), objects)
+        except Exception:
+            # A referenced object doesn't exist yet, so it will be created first.
+            return "update"
+
+        properties["name"] = resource["name"]
+
+        return "none" if _is_subset(properties, existing) else "update"
+
+    def _apply_action(self, action, existing, objects):
+        resource = action["resource"]
+        if action["action"] == "none":
+            return existing
+
+        properties = self._resolve(resource.get("properties", {}), objects)
+        properties["name"] = resource["name"]
+
+        if action["action"] == "create":
+            LOGGER.info("Creating %s", self._key(resource))
+            return self._perform(resource, "create" + resource["kind"], properties)
+
+        # The plan may not have been able to resolve every reference, so the object may already be up to date.
+        changes = _changes(properties, existing)
+        if not changes:
+            return existing
+
+        LOGGER.info("Updating %s: %s", self._key(resource), ", ".join(sorted(changes)))
+        command_name = "update" + resource["kind"]
+        result = self._perform(resource, command_name, changes, **{self._id_argument(resource, command_name): existing["id"]})
+
+        return result if isinstance(result, dict) else existing
+
+    def _delete(self, resource, existing):
+        if existing:
+            LOGGER.info("Deleting %s", self._key(resource))
+            command_name = "delete" + resource["kind"]
+            self._perform(resource, command_name, **{self._id_argument(resource, command_name): existing["id"]})
+
+
+def _changes(desired, current):
+    """Return the top-level properties in desired that are different in current. Changed dictionaries
+    are merged with the current value, so that the properties that weren't specified are kept.
+    """
+    return {key: _merge(value, current.get(key)) for key, value in desired.items()
+            if key not in current or not _is_subset(value, current[key])}
+
+
+def _merge(desired, current):
+    if isinstance(desired, dict) and isinstance(current, dict):
+        merged = dict(current)
+        for key, value in desired.items():
+            merged[key] = _merge(value, current.get(key))
+        return merged
+
+    return desired
+
+
+def _is_subset(desired, current):
+    """Return True if every value in desired is also found in current.
+    """
+    if isinstance(desired, dict):
+        return isinstance(current, dict) and all(key in current and _is_subset(value, current[key]) for key, value in desired.items())
+
+    if isinstance(desired, list):
+        return isinstance(current, list) and len(desired) == len(current) and all(_is_subset(a, b) for a, b in zip(desired, current))
+
+    return desired == current
+
+
+# =============================================================================
+class ControllerSnapshot:
+    """Backup and restore the object definitions (tests, subnets, profiles, queues, etc) of a controller.
+
+    The backup is a ZIP archive containing a "manifest.json" file and one JSON file for each "list" command
+    (e.g. "Subnets/listIpv4Subnets.json"). Every list command that doesn't require a path argument is
+    included. When a list command has a matching "get" command, the complete objects are saved.
+    An object that is returned by more than one list command (e.g. "listEmixTests" and "listTests") is
+    only saved once, with the first of those commands.
+    """
+    # These fields are set by the controller, so they are removed before an object is restored.
+    server_fields = ("id", "createdAt", "updatedAt", "createdBy", "updatedBy", "author", "owner")
+
+    def __init__(self, cyberfloodobject, max_workers=8):
+        self.cf = cyberfloodobject
+        self.max_workers = max_workers
+
+        # The objects that could not be restored by the last restore(), as {old id: error message}.
+        self.failures = {}
+
+    def backup(self, filename, object_types=None):
+        """Save the objects for the specified object types (default: all of them) to a ZIP archive.
+        Returns the manifest.
+        """
+        manifest = {"client_version": __version__,
+                    "controller": self.cf.controller_address,
+                    "created": datetime.datetime.now().isoformat(),
+                    "objects": []}
+
+        with zipfile.ZipFile(filename, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for object_type in object_types or sorted(self.cf.object_types.keys()):
+                saved_ids = set()
+                for command_name, command in sorted(self.cf.object_types[object_type].items()):
+                    if not command_name.startswith("list") or command.httpverb != "get" or command.path_parameters:
+                        continue
+
+                    try:
+                        objects = self._download(command, saved_ids)
+                    except Exception as e:
+                        LOGGER.warning("Skipping %s (%s): %s", command_name, object_type, str(e))
+                        continue
+
+                    member = object_type + "/" + command_name + ".json"
+                    archive.writestr(member, json.dumps(objects))
+
+                    get_command = command.get_command()
+                    manifest["objects"].append({"object_type": object_type,
+                                                "list_command": command_name,
+                                                "get_command": get_command.name if get_command else None,
+                                                "count": len(objects),
+                                                "file": member})
+
+                    LOGGER.info("Saved %d objects from %s (%s).", len(objects), command_name, object_type)
+
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+
+        return manifest
+
+    def _download(self, command, saved_ids):
+        items = [item for item in command.perform() or [] if isinstance(item, dict) and "id" in item and item["id"] not in saved_ids]
+        items = list({item["id"]: item for item in items}.values())
+        saved_ids.update(item["id"] for item in items)
+
+        get_command = command.get_command()
+        if not get_command:
+            return items
+
+        argument = re.findall("{(.+?)}", get_command.path)[-1]
+
+        return concurrent_map(lambda item: get_command.perform(**{argument: item["id"]}), items, self.max_workers)
+
+    def restore(self, filename, object_types=None, skip_existing=True):
+        """Recreate the objects in a backup archive. Objects that refer to other objects in the archive
+        are created after them, with the old IDs replaced by the new IDs.
+        When skip_existing is True, objects with the same name as an existing object are not created again.
+        Returns a dictionary that maps each old ID to its new ID. An object that can't be created doesn't
+        stop the restore; the errors are logged at the end, and saved in the "failures" attribute.
+        """
+        self.failures = {}
+
+        with zipfile.ZipFile(filename, "r") as archive:
+            manifest = json.loads(archive.read("manifest.json"))
+
+            entries = []
+            for section in manifest["objects"]:
+                if object_types and section["object_type"] not in object_types:
+                    continue
+
+                create_command = self._create_command(section)
+                if not create_command:
+                    LOGGER.warning("Unable to restore %s (%s). There is no create command.", section["list_command"], section["object_type"])
+                    continue
+
+                for obj in json.loads(archive.read(section["file"])):
+                    entries.append((section, create_command, obj))
+
+        id_map = {}
+        if skip_existing:
+            for section, create_command, obj in entries:
+                existing_id = self.cf.resolve_id(section["object_type"], obj.get("name"))
+                if existing_id is not None:
+                    id_map[obj["id"]] = existing_id
+
+        entries = [entry for entry in entries if entry[2]["id"] not in id_map]
+
+        for level in self._levels(entries):
+            new_ids = concurrent_map(lambda entry: self._create(entry, id_map), level, self.max_workers)
+            for (section, create_command, obj), new_id in zip(level, new_ids):
+                if new_id is not None:
+                    id_map[obj["id"]] = new_id
+
+        LOGGER.info("Restored %d objects from %s.", len(entries) - len(self.failures), filename)
+
+        if self.failures:
+            LOGGER.warning("Unable to restore %d objects:", len(self.failures))
+            for old_id, error in self.failures.items():
+                LOGGER.warning("    %s: %s", old_id, error)
+
+        return id_map
+
+    def _create_command(self, section):
+        commands = self.cf.object_types.get(section["object_type"], {})
+
+        if section.get("get_command"):
+            name = "create" + section["get_command"][len("get"):]
+            if name in commands and commands[name].httpverb == "post":
+                return commands[name]
+
+        return None
+
+    def _create(self, entry, id_map):
+        section, create_command, obj = entry
+
+        payload = _replace_ids(obj, id_map)
+        for field in self.server_fields:
+            payload.pop(field, None)
+
+        try:
+            result = create_command.perform(payload)
+        except Exception as e:
+            self.failures[obj["id"]] = str(obj.get("name")) + " (" + section["object_type"] + "): " + str(e)
+            return None
+        finally:
+            self.cf.name_resolver.invalidate(section["object_type"])
+
+        return result.get("id") if isinstance(result, dict) else None
+
+    def _levels(self, entries):
+        """Group the entries into levels. Each object only refers to objects in earlier levels.
+        """
+        ids = {entry[2]["id"] for entry in entries}
+        dependencies = [(_string_values(entry[2]) & ids) - {entry[2]["id"]} for entry in entries]
+
+        levels = []
+        done = set()
+        remaining = list(range(len(entries)))
+        while remaining:
+            level = [index for index in remaining if dependencies[index] <= done]
+            if not level:
+                # Circular references. Create the rest anyway; the IDs that aren't known yet are left alone.
+                level = remaining
+
+            levels.append([entries[index] for index in level])
+            done.update(entries[index][2]["id"] for index in level)
+            level = set(level)
+            remaining = [index for index in remaining if index not in level]
+
+        return levels
+
+
+def _string_values(value):
+    """Return a set of all of the strings in a JSON value.
+    """
+    if isinstance(value, dict):
+        return set().union(*[_string_values(item) for item in value.values()]) if value else set()
+
+    if isinstance(value, list):
+        return set().union(*[_string_values(item) for item in value]) if value else set()
+
+    return {value} if isinstance(value, str) else set()
+
+
+def _replace_ids(value, id_map):
+    """Return a copy of the JSON value, with any strings found in id_map replaced.
+    """
+    if isinstance(value, dict):
+        return {key: _replace_ids(item, id_map) for key, item in value.items()}
+
+    if isinstance(value, list):
+        return [_replace_ids(item, id_map) for item in value]
+
+    if isinstance(value, str):
+        return id_map.get(value, value)
+
+    return value
+
+
+# =============================================================================
+class TrafficMix:
+    """Builds the traffic mix ("config.trafficMix.mixer") of a test configuration.
+    The mixer entries are indexed by name, so adding or modifying an entry doesn't require a search.
+    """
+    def __init__(self, cyberfloodobject, config):
+        self.cf = cyberfloodobject
+        self.config = config
+
+        traffic_mix = config["config"].setdefault("trafficMix", {})
+        self.mixer = traffic_mix.setdefault("mixer", [])
+
+        self._entries = {entry["name"]: entry for entry in self.mixer}
+
+    def add_protocol(self, protocol_name, percentage):
+        """Add (or modify) a built-in traffic protocol in the traffic mix.
+        """
+        protocol = self.cf.traffic_mix_defaults().get(protocol_name)
+        if not protocol:
+            raise Exception("The protocol '" + protocol_name + "' is not valid.")
+
+        entry = self._entries.get(protocol_name)
+        if entry:
+            entry["config"] = copy.deepcopy(protocol["config"])
+            entry["percentage"] = percentage
+        else:
+            self._add({"name": protocol["name"],
+                       "config": copy.deepcopy(protocol["config"]),
+                       "percentage": percentage,
+                       "type": protocol["type"]})
+
+        return self.config
+
+    def add_profile(self, profile_name, percentage):
+        """Add (or modify) a traffic profile in the traffic mix.
+        """
+        entry = self._entries.get(profile_name)
+        if entry:
+            entry["percentage"] = percentage
+        else:
+            self._add({"name": profile_name, "percentage": percentage, "type": "profile"})
+
+        return self.config
+
+    def remove(self, name):
+        entry = self._entries.pop(name, None)
+        if entry:
+            self.mixer.remove(entry)
+
+        return self.config
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def _add(self, entry):
+        self.mixer.append(entry)
+        self._entries[entry["name"]] = entry
+
+
+# =============================================================================
+class Cassette:
+    """Records HTTP interactions with the controller to a file, or replays them.
+
+    The cassette file contains one JSON object per line, one for each request:
+        {"method": "get", "url": "/tests?filter[name]=x", "body": <the JSON payload>, "status": 200,
+         "headers": {...}, "content": <base64 response body>, "elapsed": <seconds>}
+    URLs are saved relative to the controller address, so a cassette can be replayed with any address.
+
+    When replaying, responses are matched by method, URL and body. Identical requests (e.g. polling a
+    test run) receive the recorded responses in the order they were recorded; once those are used up,
+    the last one is repeated.
+    """
+    def __init__(self, filename, mode="replay", latency=None):
+        if mode not in ("record", "replay"):
+            raise Exception("The cassette mode must be 'record' or 'replay'.")
+
+        self.filename = os.path.abspath(filename)
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+
+        if mode == "record":
+            self._file = open(self.filename, "w", encoding="utf-8")
+        else:
+            self._interactions = {}
+            with open(self.filename, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        interaction = json.loads(line)
+                        self._interactions.setdefault(self._key(interaction["method"], interaction["url"], interaction["body"]), []).append(interaction)
+
+            self._positions = {}
+
+    @staticmethod
+    def _key(method, url, body):
+        return method.lower() + " " + url + " " + (body or "")
+
+    def play(self, method, url, body, send):
+        if self.mode == "replay":
+            return self._replay(method, url, body)
+
+        start = time.perf_counter()
+        response = send()
+        elapsed = time.perf_counter() - start
+
+        # Reading the content here means that it can also be read by the caller afterwards.
+        content = response.content or b""
+
+        interaction = {"method": method.lower(), "url": url, "body": body,
+                       "status": response.status_code,
+                       "headers": dict(response.headers),
+                       "content": base64.b64encode(content).decode("ascii"),
+                       "elapsed": elapsed}
+
+        with self._lock:
+            self._file.write(json.dumps(interaction) + "\n")
+            self._file.flush()
+
+        return response
+
+    def _replay(self, method, url, body):
+        key = self._key(method, url, body)
+
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if not interactions:
+                raise Exception("The cassette " + self.filename + " has no recorded response for " + method.upper() + " " + url)
+
+            position = self._positions.get(key, 0)
+            interaction = interactions[min(position, len(interactions) - 1)]
+            self._positions[key] = position + 1
+
+        if self.latency == "recorded":
+            time.sleep(interaction["elapsed"])
+        elif self.latency:
+            time.sleep(self.latency)
+
+        response = requests.Response()
+        response.status_code = interaction["status"]
+        response.headers = requests.structures.CaseInsensitiveDict(interaction["headers"])
+        response._content = base64.b64decode(interaction["content"])
+        response._content_consumed = True
+        response.url = url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+
+        return response
+
+    def close(self):
+        if self.mode == "record":
+            with self._lock:
+                self._file.close()
+
+
+# =============================================================================
+class Profile:
+    """Profiles a CyberFlood object. Use the CyberFlood profile method to create it.
+
+    While active:
+        -The calling thread is profiled with cProfile. The statistics are available as "stats" (pstats.Stats).
+        -Every request (from any thread) is timed. Each entry in "requests" is a dictionary containing the
+         command, tag, method, url, status and these durations (in seconds):
+            total     - The complete exec() call.
+            throttled - Waiting for the request limits (see RequestGovernor).
+            encode    - Building the URL and the JSON payload.
+            connect   - DNS lookup and TCP connect, when a new connection was needed.
+            tls       - The TLS handshake, when a new HTTPS connection was needed.
+            ttfb      - From sending the request until the response headers were received.
+            download  - Receiving the response body.
+            decode    - Decoding the response (or saving the attachment).
+    The connect and TLS times are measured by temporarily wrapping the urllib3 connection classes.
+    """
+    _timers_lock = threading.Lock()
+    _timers_installed = 0
+    _original_methods = {}
+
+    def __init__(self, cyberfloodobject, sort="cumulative"):
+        self.cf = cyberfloodobject
+        self.sort = sort
+
+        self.requests = []
+        self.profiler = cProfile.Profile()
+        self.stats = None
+        self.wall_seconds = 0.0
+
+        self._lock = threading.Lock()
+        self._start = None
+
+    def __enter__(self):
+        self._install_connection_timers()
+        self.cf._profiler = self
+        self._start = time.perf_counter()
+        self.profiler.enable()
+
+        return self
+
+    def __exit__(self, *args):
+        self.profiler.disable()
+        self.wall_seconds = time.perf_counter() - self._start
+        self.cf._profiler = None
+        self._remove_connection_timers()
+
+        self.stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        self.stats.sort_stats(self.sort)
+
+    def add_request(self, command, tag, httpverb, url, elapsed, stats, error):
+        send = stats.get("send_seconds", 0.0)
+        ttfb = stats.get("ttfb_seconds", 0.0)
+        connect = stats.get("connect_seconds", 0.0)
+        tls = stats.get("tls_seconds", 0.0)
+
+        entry = {"command": command, "tag": tag, "method": httpverb.upper(), "url": url,
+                 "status": stats.get("status"), "error": error,
+                 "total": elapsed,
+                 "throttled": stats.get("throttled_seconds", 0.0),
+                 "encode": stats.get("encode_seconds", 0.0),
+                 "connect": connect,
+                 "tls": tls,
+                 # requests includes the connection setup in "elapsed".
+                 "ttfb": max(0.0, ttfb - connect - tls),
+                 "download": max(0.0, send - ttfb),
+                 "decode": stats.get("decode_seconds", 0.0)}
+
+        with self._lock:
+            self.requests.append(entry)
+
+    def summary(self):
+        """Return the request times grouped by command, sorted by the total time.
+        """
+        commands = {}
+        for entry in self.requests:
+            summary = commands.setdefault((entry["command"], entry["tag"]), {"command": entry["command"], "tag": entry["tag"], "count": 0, "errors": 0,
+                                                                           "total": 0.0, "throttled": 0.0, "encode": 0.0, "connect": 0.0, "tls": 0.0,
+                                                                           "ttfb": 0.0, "download": 0.0, "decode": 0.0})
+            summary["count"] += 1
+            summary["errors"] += 1 if entry["error"] else 0
+            for key in ("total", "throttled", "encode", "connect", "tls", "ttfb", "download", "decode"):
+                summary[key] += entry[key]
+
+        return sorted(commands.values(), key=lambda summary: summary["total"], reverse=True)
+
+    def report(self, limit=25):
+        """Return a text report: the time per command, followed by the top functions from cProfile.
+        """
+        lines = []
+        summaries = self.summary()
+
+        request_seconds = sum(summary["total"] for summary in summaries)
+        # Time to first byte is the time the controller spent processing the requests.
+        controller_seconds = sum(summary["ttfb"] for summary in summaries)
+        network_seconds = sum(summary["connect"] + summary["tls"] + summary["download"] for summary in summaries)
+        throttled_seconds = sum(summary["throttled"] for summary in summaries)
+        client_seconds = max(0.0, self.wall_seconds - controller_seconds - network_seconds - throttled_seconds)
+
+        lines.append("Wall time:             %10.3fs" % self.wall_seconds)
+        lines.append("Requests:              %10d (%.3fs)" % (len(self.requests), request_seconds))
+        lines.append("Waiting for controller:%10.3fs" % controller_seconds)
+        lines.append("Network:               %10.3fs" % network_seconds)
+        lines.append("Throttled:             %10.3fs" % throttled_seconds)
+        lines.append("Client:                %10.3fs" % client_seconds)
+        lines.append("")
+
+        header = "%-40s %6s %10s %9s %9s %9s %9s %9s %9s" % ("Command", "Count", "Total", "Encode", "Connect", "TLS", "TTFB", "Download", "Decode")
+        lines.append(header)
+        lines.append("-" * len(header))
+        for summary in summaries:
+            name = summary["command"] + (" (" + summary["tag"] + ")" if summary["tag"] else "")
+            lines.append("%-40s %6d %9.3fs %8.3fs %8.3fs %8.3fs %8.3fs %8.3fs %8.3fs" % (
+                name[:40], summary["count"], summary["total"], summary["encode"], summary["connect"],
+                summary["tls"], summary["ttfb"], summary["download"], summary["decode"]))
+
+        if self.stats:
+            lines.append("")
+            self.stats.stream = io.StringIO()
+            self.stats.print_stats(limit)
+            lines.append(self.stats.stream.getvalue())
+
+        return "\n".join(lines)
+
+    @classmethod
+    def _install_connection_timers(cls):
+        import urllib3.connection
+
+        with cls._timers_lock:
+            cls._timers_installed += 1
+            if cls._timers_installed > 1:
+                return
+
+            for connection_class, method_name, key in ((urllib3.connection.HTTPConnection, "_new_conn", "connect_seconds"),
+                                                       (urllib3.connection.HTTPConnection, "connect", "handshake_seconds"),
+                                                       (urllib3.connection.HTTPSConnection, "connect", "handshake_seconds")):
+                if method_name not in connection_class.__dict__:
+                    continue
+
+                original = connection_class.__dict__[method_name]
+                cls._original_methods[(connection_class, method_name)] = original
+                setattr(connection_class, method_name, cls._timer(original, key))
+
+    @classmethod
+    def _remove_connection_timers(cls):
+        with cls._timers_lock:
+            cls._timers_installed -= 1
+            if cls._timers_installed > 0:
+                return
+
+            for (connection_class, method_name), original in cls._original_methods.items():
+                setattr(connection_class, method_name, original)
+
+            cls._original_methods = {}
+
+    @staticmethod
+    def _timer(method, key):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                stats = getattr(_connection_timing, "stats", None)
+                if stats is not None:
+                    elapsed = time.perf_counter() - start
+                    if key == "connect_seconds":
+                        stats["connect_seconds"] = stats.get("connect_seconds", 0.0) + elapsed
+                    else:
+                        # The handshake includes the connect time. The rest is the TLS handshake.
+                        stats["tls_seconds"] = stats.get("tls_seconds", 0.0) + max(0.0, elapsed - stats.get("connect_seconds", 0.0))
+        return timed
@@ -0,0 +1,395 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+# This may help with Python 2/3 compatibility.
+
+# The next line is intentionally blank.
+
+__author__ = "Matthew Jefferson"
+__version__ = "0.0.1"
+
+# The previous line is intentionally blank.
+
+"""
+    Spirent CyberFlood Mock Controller
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    A local stand-in for a CyberFlood controller, used to test and benchmark the CyberFlood Python client
+    without real hardware. The mock reads the same OpenAPI.yaml file that the client uses for its
+    perform commands, and serves:
+        POST /api/v2/token                 - Any credentials are accepted.
+        GET  /api/v2/system/version        - The version specified when starting the mock.
+        GET  /api/v2/client/openapi.yaml   - The spec itself, as a file attachment.
+        Every path in the spec             - Stateful, in-memory CRUD. A POST to a collection creates an
+                                             object, and GET/PUT/DELETE on "<collection>/{id}" read, update
+                                             and delete it. Collections can be filtered with filter[key]=value.
+
+    Starting a test (the "startTest" command, or any PUT/POST to a path ending in "/start") creates a test
+    run that is "waiting" for waiting_duration seconds, "running" for run_duration seconds, and then
+    "completed". A simulated result is then available from the test run and the test.
+
+    Examples:
+        1. From Python:
+            with MockController("openapi.yaml") as mock:
+                cf = CyberFlood.CyberFlood("user", "password", mock.address, log_to_file=False)
+
+        2. From the command line:
+            python CyberFloodMock.py openapi.yaml --port 8080
+
+    Modification History:
+    0.0.1 : 10/19/2026 - Matthew Jefferson
+        -The initial code.
+
+    :copyright: (c) 2026 by Matthew Jefferson.
+"""
+
+import re
+import sys
+import json
+import ssl
+import time
+import uuid
+import random
+import argparse
+import datetime
+import threading
+import urllib.parse
+import http.server
+
+import yaml
+
+
+# =============================================================================
+class MockController:
+    def __init__(self, spec, host="127.0.0.1", port=0, version="0.0.0-mock", run_duration=10, waiting_duration=2,
+                 latency=0, certfile=None, keyfile=None):
+        """The spec can be the filename of the OpenAPI.yaml (or a cached JSON) file, or the spec dictionary.
+        The latency (in seconds) is added to every response, to simulate the controller's processing time.
+        HTTPS is used when a certificate file is specified.
+        """
+        if isinstance(spec, dict):
+            self.spec = spec
+            self.spec_text = yaml.safe_dump(spec)
+        else:
+            with open(spec, "r", encoding="utf-8") as f:
+                self.spec_text = f.read()
+
+            if spec.endswith(".json"):
+                self.spec = json.loads(self.spec_text)
+            else:
+                self.spec = yaml.safe_load(self.spec_text)
+
+        self.version = version
+        self.run_duration = run_duration
+        self.waiting_duration = waiting_duration
+        self.latency = latency
+
+        self.routes = self._build_routes(self.spec)
+
+        # object ID -> (collection paths, object). An object may belong to more than one collection
+        # (e.g. a result belongs to the test run and the test). See _members().
+        self.objects = {}
+        self.lock = threading.Lock()
+        self.tokens = set()
+
+        self.server = http.server.ThreadingHTTPServer((host, port), _MockRequestHandler)
+        self.server.daemon_threads = True
+        self.server.mock = self
+
+        self.scheme = "http"
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+            self.scheme = "https"
+
+        self.thread = None
+
+    @property
+    def address(self):
+        """The address to use for the CyberFlood controller_address argument.
+        """
+        host, port = self.server.server_address[:2]
+        return self.scheme + "://" + host + ":" + str(port)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _build_routes(spec):
+        """Convert each path in the spec into a regular expression.
+        Paths with fewer arguments are matched first, so that "/tests/emix" is found before "/tests/{testId}".
+        """
+        routes = []
+        for path, verbs in spec.get("paths", {}).items():
+            pattern = "^" + re.sub("{[^/]+?}", "([^/]+)", re.escape(path).replace("\\{", "{").replace("\\}", "}")) + "/?$"
+            for verb, definition in verbs.items():
+                if isinstance(definition, dict):
+                    routes.append((path.count("{"), -len(path), re.compile(pattern), path, verb.lower(), definition))
+
+        routes.sort(key=lambda route: route[:2])
+
+        return [route[2:] for route in routes]
+
+    def handle(self, method, path, query, body, headers):
+        """Process a request. Returns (status, headers, body). The body is bytes, or a JSON value.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+
+        if path == "/token" and method == "post":
+            token = uuid.uuid4().hex
+            with self.lock:
+                self.tokens.add(token)
+            return 201, {}, {"token": token}
+
+        authorization = headers.get("Authorization", "")
+        if not authorization.startswith("Bearer ") or authorization[len("Bearer "):] not in self.tokens:
+            return 401, {}, {"type": "unauthorized", "message": "Invalid or missing token"}
+
+        if path == "/system/version" and method == "get":
+            return 200, {}, {"version": self.version}
+
+        if path == "/client/openapi.yaml" and method == "get":
+            return 200, {"Content-Type": "application/octet-stream",
+                         "Content-Disposition": 'attachment; filename="openapi.yaml"'}, self.spec_text.encode("utf-8")
+
+        for pattern, template, verb, definition in self.routes:
+            if verb != method:
+                continue
+
+            match = pattern.match(path)
+            if match:
+                with self.lock:
+                    return self._operation(method, path, template, definition, query, body)
+
+        return 404, {}, {"type": "not_found", "message": "Unknown path " + path}
+
+    def _operation(self, method, path, template, definition, query, body):
+        operation = definition.get("operationId", "")
+        segments = path.rstrip("/").split("/")
+        item = template.rstrip("/").endswith("}")
+
+        if operation == "startTest" or (path.rstrip("/").endswith("/start") and method in ("put", "post")):
+            return self._start_test(segments[-2])
+
+        if not item:
+            collection = path.rstrip("/")
+            if method == "get":
+                return 200, {}, [self._refresh(obj) for obj in self._members(collection) if self._matches(obj, query)]
+            if method == "post":
+                obj = dict(body if isinstance(body, dict) else {})
+                obj["id"] = uuid.uuid4().hex
+                self.objects[obj["id"]] = ((collection,), obj)
+                return 201, {}, obj
+            return 200, {}, body if body else {}
+
+        collection, object_id = "/".join(segments[:-1]), segments[-1]
+        obj = self._find(collection, object_id)
+        if obj is None:
+            return 404, {}, {"type": "not_found", "message": "Unable to find " + object_id}
+
+        if method == "get":
+            return 200, {}, self._refresh(obj)
+        if method == "put":
+            if isinstance(body, dict):
+                obj.update(body)
+                obj["id"] = object_id
+            return 200, {}, obj
+        if method == "delete":
+            del self.objects[object_id]
+            return 204, {}, None
+
+        return 200, {}, obj
+
+    def _members(self, collection):
+        """Return the objects in a collection. A collection also includes the objects created in the
+        collections one (literal) level below it. e.g. "/tests" includes the objects from "/tests/emix".
+        """
+        return [obj for parents, obj in self.objects.values() if self._in_collection(parents, collection)]
+
+    def _find(self, collection, object_id):
+        entry = self.objects.get(object_id)
+        if entry is None or not self._in_collection(entry[0], collection):
+            return None
+
+        return entry[1]
+
+    @staticmethod
+    def _in_collection(parents, collection):
+        for parent in parents:
+            if parent == collection or (parent.startswith(collection + "/") and "/" not in parent[len(collection) + 1:]):
+                return True
+
+        return False
+
+    @staticmethod
+    def _matches(obj, query):
+        """Apply the "filter[key]=value" query parameters. Only equality filters are supported.
+        """
+        for key, values in query.items():
+            match = re.fullmatch(r"filter\[([^\]]+)\]", key)
+            if match and str(obj.get(match.group(1))) != values[-1]:
+                return False
+
+        return True
+
+    # -------------------------------------------------------------------------
+    def _start_test(self, test_id):
+        test = self.objects.get(test_id)
+        if test is None:
+            return 404, {}, {"type": "not_found", "message": "Unable to find test " + test_id}
+
+        run = {"id": uuid.uuid4().hex,
+               "testId": test_id,
+               "testName": test[1].get("name", ""),
+               "status": "waiting",
+               "subStatus": "reserving",
+               "timeRemaining": self.run_duration,
+               "startedAt": time.time()}
+        self.objects[run["id"]] = (("/test_runs",), run)
+
+        return 200, {}, dict(run)
+
+    def _refresh(self, obj):
+        """Advance a simulated test run, based on the time since it was started.
+        """
+        if "startedAt" not in obj or obj.get("status") not in ("waiting", "running"):
+            return obj
+
+        elapsed = time.time() - obj["startedAt"]
+        if elapsed < self.waiting_duration:
+            obj["status"] = "waiting"
+            obj["subStatus"] = "reserving"
+        elif elapsed < self.waiting_duration + self.run_duration:
+            obj["status"] = "running"
+            obj["subStatus"] = ""
+            obj["timeRemaining"] = int(self.waiting_duration + self.run_duration - elapsed)
+        else:
+            obj["status"] = "completed"
+            obj["subStatus"] = ""
+            obj["timeRemaining"] = 0
+
+            result = self._result(obj)
+            self.objects[result["id"]] = (("/test_runs/" + obj["id"] + "/results", "/tests/" + obj["testId"] + "/results"), result)
+
+        return obj
+
+    def _result(self, run):
+        """Generate a simulated result for a completed test run.
+        """
+        duration = max(1, int(self.run_duration))
+        series = [[t, random.randint(3000, 6000) if t else 0] for t in range(0, duration + 1, 4)]
+        finished = datetime.datetime.now(datetime.timezone.utc)
+
+        return {"id": uuid.uuid4().hex,
+                "testRunId": run["id"],
+                "testId": run["testId"],
+                "status": "completed",
+                "raw": {"Summary": {"Average CPS": random.uniform(10000, 15000),
+                                    "Average TPS": sum(point[1] for point in series) / len(series),
+                                    "Average Throughput": random.uniform(2.5e6, 3e6),
+                                    "Completion": 100,
+                                    "Test Duration": duration,
+                                    "Test Name": run.get("testName", ""),
+                                    "Started At": (finished - datetime.timedelta(seconds=duration)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                                    "Finished At": finished.strftime("%Y-%m-%dT%H:%M:%S.000Z")},
+                        "Connections": {"Successful Transactions/Second": series}}}
+
+
+# =============================================================================
+class _MockRequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # The headers and body are written separately. Without this, each response can be delayed by ~40ms.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # The mock is used for benchmarks, so don't write a line for every request.
+        pass
+
+    def _handle(self):
+        url = urllib.parse.urlsplit(self.path)
+        path = urllib.parse.unquote(url.path)
+
+        if not path.startswith("/api/v2"):
+            return self._reply(404, {}, {"type": "not_found", "message": "Unknown path " + path})
+
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+
+        body = None
+        if raw_body:
+            if "json" in (self.headers.get("Content-Type") or ""):
+                try:
+                    body = json.loads(raw_body)
+                except ValueError:
+                    return self._reply(400, {}, {"type": "validation", "message": "Invalid JSON"})
+            else:
+                body = {key: values[-1] for key, values in urllib.parse.parse_qs(raw_body.decode("utf-8", "replace")).items()}
+
+        status, headers, result = self.server.mock.handle(self.command.lower(), path[len("/api/v2"):] or "/",
+                                                          urllib.parse.parse_qs(url.query), body, self.headers)
+        self._reply(status, headers, result)
+
+    def _reply(self, status, headers, result):
+        if isinstance(result, bytes):
+            content = result
+        elif result is None:
+            content = b""
+        else:
+            content = json.dumps(result).encode("utf-8")
+            headers = dict(headers, **{"Content-Type": "application/json"})
+
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+
+        if content and self.command != "HEAD":
+            self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = _handle
+
+
+# =============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a mock CyberFlood controller.")
+    parser.add_argument("spec", help="The OpenAPI.yaml file (or the cached perform commands JSON file).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--version", default="0.0.0-mock", help="The controller version to report.")
+    parser.add_argument("--run-duration", type=float, default=10, help="The number of seconds each test runs.")
+    parser.add_argument("--waiting-duration", type=float, default=2, help="The number of seconds each test waits before running.")
+    parser.add_argument("--latency", type=float, default=0, help="Seconds added to every response.")
+    parser.add_argument("--certfile", help="Serve HTTPS with this certificate.")
+    parser.add_argument("--keyfile", help="The private key for the certificate.")
+    args = parser.parse_args(argv)
+
+    mock = MockController(args.spec, host=args.host, port=args.port, version=args.version, run_duration=args.run_duration,
+                          waiting_duration=args.waiting_duration, latency=args.latency, certfile=args.certfile, keyfile=args.keyfile)
+
+    print("Mock CyberFlood controller listening at " + mock.address)
+
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.server.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
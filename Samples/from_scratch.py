@@ -129,61 +129,6 @@ def get_profile_id(name):
         
     return profile_id
 
-def add_protocol_to_traffic_mix(config, protocol_name, percentage): 
-    # Add (or modify) a built-in traffic protocol to the traffic mix.
-
-    # Find the specified protocol.    
-    found = False
-    for protocol in cf.perform("trafficMixesDefaults"):
-        if protocol['name'] == protocol_name:
-
-            mix_entry = {}
-            mix_entry['name'] = protocol['name']
-            mix_entry['config'] = protocol['config']
-            mix_entry['percentage'] = percentage
-            mix_entry['type'] = protocol['type']
-
-            # Determine if this protocol is already in the mix.
-            not_found = True
-            for entry in config['config']["trafficMix"]['mixer']:
-                if entry['name'] == mix_entry['name']:
-                    entry['config'] = mix_entry['config']
-                    entry['percentage'] = mix_entry['percentage']
-
-                    not_found = False
-                    break
-
-            if not_found:
-                config['config']["trafficMix"]['mixer'].append(mix_entry)            
-
-            found = True
-
-    if not found:
-        raise Exception("The protocol '" + protocol_name + "' is not valid.")
-
-    return config
-
-def add_profile_to_traffic_mix(config, profile_name, percentage):
-    # Add (or modify) a traffic profile to the traffic mix.
-
-    mix_entry = {}
-    mix_entry['name'] = profile_name
-    mix_entry['percentage'] = percentage
-    mix_entry['type'] = "profile"
-
-    # Determine if this protocol is already in the mix.
-    not_found = True
-    for entry in config['config']["trafficMix"]['mixer']:
-        if entry['name'] == mix_entry['name']:
-            entry['percentage'] = mix_entry['percentage']
-            not_found = False
-            break
-
-    if not_found:
-        config['config']["trafficMix"]['mixer'].append(mix_entry)                  
- 
-    return config
-
 def get_subnet_id(config, side, subnet_name):
 
     subnet_id = None
@@ -220,19 +165,8 @@ def map_subnet_to_interface(config, side, subnet_name, location):
 
 def get_port_id(location):
     # Return the ID for the specified port location (e.g. 10.140.99.10/1/2).
-
-    port_id = None
-    for device in cf.perform("listDevices"):
-        deviceinfo = cf.perform("getDevice", deviceId=device['id'])
-
-        for slot in deviceinfo['slots']:
-            for cg in slot['computeGroups']:
-                for port in cg['ports']:
-                    if port['systemId'] == location:
-                        port_id = port['id']
-                        break
-
-    return port_id
+    # The port index downloads the device inventory once, so subsequent lookups are free.
+    return port_index.port_id(location)
 
 def reserve_ports(config, queue_name="Temp-Automation-Queue"):
     # Ports must be added to a queue before the test can be run.
@@ -250,27 +184,9 @@ def reserve_ports(config, queue_name="Temp-Automation-Queue"):
         raise Exception("There are no ports specified in the configuration.")
 
     # Determine if the ports are already part of a queue.
-    found_queue = False    
-    for queue in cf.perform("listQueues"):
-        queue_info = cf.perform("getQueue", queueId=queue["id"])
-
-        # Virtual ports are found under the "computeGroups" key.
-        for cg in queue_info['computeGroups']:
-            for port in cg['ports']:
-                if port['systemId'] in port_locations:
-                    found_queue = True
-                    break
-
-        # None-virtual ports are found under the "ports" key.
-        for port in queue['ports']:
-            if port['systemId'] in port_locations:
-                found_queue = True
-                break
-
-        if found_queue:
-            break
+    queue_info = cf.find_queue_for_ports(port_locations, require_all=False)
 
-    if not found_queue:
+    if not queue_info:
         # We need to create a queue for the ports.
         port_ids = []
         for location in port_locations:
@@ -307,6 +223,7 @@ pp = pprint.PrettyPrinter(indent=2)
 
 print("Initializing the CyberFlood object...")
 cf = CyberFlood.CyberFlood(username=username, password=password, controller_address=cfcontroller, log_level="DEBUG")
+port_index = CyberFlood.PortIndex(cf)
 
 # Check to see if the named test already exists.
 test_info = None
@@ -359,15 +276,17 @@ test_info['config']['subnets']['client'] = [client_subnet]
 test_info['config']['subnets']['server'] = [server_subnet]
 
 # Configure the traffic mix.
+# The built-in protocols are only downloaded once, no matter how many are added.
 test_info['config']["trafficMix"]['mixer'] = []
-add_profile_to_traffic_mix(test_info, "BGP_VF", 4)
-add_profile_to_traffic_mix(test_info, "Linkedin_VF", 5)
-add_profile_to_traffic_mix(test_info, "RDP_VF", 10)
-add_profile_to_traffic_mix(test_info, "Webex_VF", 10)
-
-add_protocol_to_traffic_mix(test_info, "Telnet", 5)
-add_protocol_to_traffic_mix(test_info, "SIP", 65)
-add_protocol_to_traffic_mix(test_info, "FTP", 1)
+traffic_mix = CyberFlood.TrafficMix(cf, test_info)
+traffic_mix.add_profile("BGP_VF", 4)
+traffic_mix.add_profile("Linkedin_VF", 5)
+traffic_mix.add_profile("RDP_VF", 10)
+traffic_mix.add_profile("Webex_VF", 10)
+
+traffic_mix.add_protocol("Telnet", 5)
+traffic_mix.add_protocol("SIP", 65)
+traffic_mix.add_protocol("FTP", 1)
 
 # Map the subnets to the CyberFlood ports.
 map_subnet_to_interface(test_info, "client", "scratch_client_b2b_1", port1_location)
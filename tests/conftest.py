@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pytest
+
+# The tests import the CyberFlood module from the repository root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import CyberFlood
+import CyberFloodMock
+
+
+# A small subset of the controller's OpenAPI spec, served by the mock controller.
+SPEC = {
+    "openapi": "3.0.0",
+    "paths": {
+        "/tests": {
+            "get": {"tags": ["Tests"], "operationId": "listTests"},
+        },
+        "/tests/{testId}/start": {
+            "put": {"tags": ["Tests"], "operationId": "startTest", "parameters": [{"in": "path", "name": "testId"}]},
+        },
+        "/test_runs/{testRunId}": {
+            "get": {"tags": ["Test Runs"], "operationId": "getTestRun", "parameters": [{"in": "path", "name": "testRunId"}]},
+        },
+        "/subnets/ipv4": {
+            "get": {"tags": ["Subnets"], "operationId": "listIpv4Subnets"},
+            "post": {"tags": ["Subnets"], "operationId": "createIpv4Subnet"},
+        },
+        "/subnets/ipv4/{profileId}": {
+            "get": {"tags": ["Subnets"], "operationId": "getIpv4Subnet", "parameters": [{"in": "path", "name": "profileId"}]},
+            "put": {"tags": ["Subnets"], "operationId": "updateIpv4Subnet", "parameters": [{"in": "path", "name": "profileId"}]},
+            "delete": {"tags": ["Subnets"], "operationId": "deleteIpv4Subnet", "parameters": [{"in": "path", "name": "profileId"}]},
+        },
+        "/subnets/ipv4/{profileId}/replicate": {
+            "post": {"tags": ["Subnets"], "operationId": "replicateIpv4Subnet",
+                     "parameters": [{"in": "path", "name": "profileId"}],
+                     "requestBody": {"content": {"application/json": {"schema": {
+                         "type": "object", "properties": {"names": {"type": "array", "items": {"type": "string"}}}}}}}},
+        },
+    },
+}
+
+
+@pytest.fixture
+def mock():
+    with CyberFloodMock.MockController(SPEC, run_duration=1, waiting_duration=0) as controller:
+        yield controller
+
+
+@pytest.fixture
+def cf(mock, tmp_path, monkeypatch):
+    # The client downloads the spec into the current directory.
+    monkeypatch.chdir(tmp_path)
+    return CyberFlood.CyberFlood("user", "password", mock.address, use_yaml_cache=False, log_to_file=False)
@@ -0,0 +1,57 @@
+import uuid
+
+import CyberFlood
+
+
+def create_subnets(cf, names):
+    return [cf.perform("createIpv4Subnet", {"name": name})["id"] for name in names]
+
+
+def test_create_many(cf):
+    ids = cf.create_many("createIpv4Subnet", [{"name": "s" + str(i)} for i in range(10)], max_workers=4)
+
+    assert len(set(ids)) == 10
+    assert [cf.perform("getIpv4Subnet", profileId=object_id)["name"] for object_id in ids] == ["s" + str(i) for i in range(10)]
+
+
+def test_clone_many_replicates_and_finds_the_new_objects(cf, mock, monkeypatch):
+    source_id, taken_id = create_subnets(cf, ["source", "copy2"])
+
+    # The mock doesn't implement replicate, so do what the controller does: create the copies server side.
+    # None of the client's perform commands are used, so the client must invalidate its own name map.
+    def replicate(names, profileId):
+        with mock.lock:
+            for name in names:
+                object_id = uuid.uuid4().hex
+                mock.objects[object_id] = (("/subnets/ipv4",), {"id": object_id, "name": name})
+
+    replicate_command = cf.commands["replicateIpv4Subnet"]["Subnets"]
+    monkeypatch.setattr(replicate_command, "perform", replicate)
+
+    # Load the name map before cloning, as a caller that resolved names earlier would have.
+    assert cf.resolve_id("Subnets", "source") == source_id
+
+    ids = cf.clone_many("getIpv4Subnet", source_id, ["copy1", "copy2"])
+
+    assert len(set(ids)) == 2
+    assert taken_id not in ids
+    assert [cf.perform("getIpv4Subnet", profileId=object_id)["name"] for object_id in ids] == ["copy1", "copy2"]
+    assert cf.resolve_id("Subnets", "copy1") == ids[0]
+
+
+def test_delete_many_deletes_repeated_ids_once(cf):
+    ids = create_subnets(cf, ["a", "b"])
+
+    outcome = cf.delete_many("Subnets", [ids[0], ids[1], ids[0]], command_name="deleteIpv4Subnet")
+
+    assert list(outcome) == ids
+    assert all(entry["status"] == "deleted" for entry in outcome.values())
+    assert cf.perform("listIpv4Subnets") == []
+
+
+def test_names_are_invalidated_by_modifying_commands(cf):
+    first_id, = create_subnets(cf, ["first"])
+    assert cf.resolve_id("Subnets", "first") == first_id
+
+    second_id, = create_subnets(cf, ["second"])
+    assert cf.resolve_id("Subnets", "second") == second_id
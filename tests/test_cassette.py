@@ -0,0 +1,58 @@
+import json
+
+import pytest
+import requests
+
+import CyberFlood
+
+
+def make_response(status, value):
+    response = requests.Response()
+    response.status_code = status
+    response.headers = requests.structures.CaseInsensitiveDict({"Content-Type": "application/json; charset=utf-8"})
+    response._content = json.dumps(value).encode("utf-8")
+    return response
+
+
+def test_round_trip(tmp_path):
+    filename = str(tmp_path / "session.jsonl")
+
+    cassette = CyberFlood.Cassette(filename, mode="record")
+    cassette.play("GET", "/test_runs/1", None, lambda: make_response(200, {"status": "waiting"}))
+    cassette.play("GET", "/test_runs/1", None, lambda: make_response(200, {"status": "running"}))
+    cassette.play("POST", "/tests", '{"name": "a"}', lambda: make_response(201, {"id": "a"}))
+    cassette.play("POST", "/tests", '{"name": "b"}', lambda: make_response(201, {"id": "b"}))
+    cassette.play("GET", "/missing", None, lambda: make_response(404, {"message": "Not found"}))
+    cassette.close()
+
+    def unexpected():
+        raise AssertionError("A replaying cassette must not send requests.")
+
+    cassette = CyberFlood.Cassette(filename)
+
+    # Identical requests get the recorded responses in order, and then the last one is repeated.
+    assert cassette.play("get", "/test_runs/1", None, unexpected).json() == {"status": "waiting"}
+    assert cassette.play("get", "/test_runs/1", None, unexpected).json() == {"status": "running"}
+    assert cassette.play("get", "/test_runs/1", None, unexpected).json() == {"status": "running"}
+
+    # Requests are also matched by body.
+    assert cassette.play("post", "/tests", '{"name": "b"}', unexpected).json() == {"id": "b"}
+    assert cassette.play("post", "/tests", '{"name": "a"}', unexpected).json() == {"id": "a"}
+
+    response = cassette.play("get", "/missing", None, unexpected)
+    assert response.status_code == 404
+    assert not response.ok
+    assert response.headers["content-type"].startswith("application/json")
+
+
+def test_unrecorded_request(tmp_path):
+    filename = str(tmp_path / "session.jsonl")
+    CyberFlood.Cassette(filename, mode="record").close()
+
+    with pytest.raises(Exception, match="no recorded response"):
+        CyberFlood.Cassette(filename).play("get", "/tests", None, None)
+
+
+def test_invalid_mode(tmp_path):
+    with pytest.raises(Exception):
+        CyberFlood.Cassette(str(tmp_path / "session.jsonl"), mode="rewind")
@@ -0,0 +1,117 @@
+import pytest
+import requests
+
+import CyberFlood
+
+
+def response(status):
+    result = requests.Response()
+    result.status_code = status
+    return result
+
+
+def expire(breaker):
+    # Move the time the circuit opened back, rather than waiting for the reset timeout.
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CyberFlood.CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+    for _ in range(2):
+        breaker.before_request()
+        breaker.record_response(response(503))
+    breaker.before_request()
+    breaker.record_response(response(200))
+    assert breaker.state == "closed"
+    assert breaker.consecutive_failures == 0
+
+    for _ in range(3):
+        breaker.before_request()
+        breaker.record_exception(requests.exceptions.ConnectionError("refused"))
+    assert breaker.state == "open"
+
+    with pytest.raises(CyberFlood.CircuitOpenError):
+        breaker.before_request()
+
+    health = breaker.health()
+    assert health["available"] is False
+    assert health["retry_in_seconds"] > 0
+    assert health["rejected"] == 1
+    assert health["failures"] == 5
+    assert "ConnectionError" in health["last_error"]
+
+
+def test_client_errors_are_not_failures():
+    breaker = CyberFlood.CircuitBreaker(failure_threshold=1)
+
+    breaker.record_response(response(404))
+    breaker.record_response(response(409))
+
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_half_open_probe_success_closes_the_circuit():
+    breaker = CyberFlood.CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure("HTTP 500")
+    expire(breaker)
+
+    assert breaker.health()["available"] is True
+    breaker.before_request()
+    assert breaker.state == "half_open"
+
+    # Only one probe is allowed at a time.
+    assert breaker.health()["available"] is False
+    with pytest.raises(CyberFlood.CircuitOpenError):
+        breaker.before_request()
+
+    breaker.record_response(response(200))
+    assert breaker.state == "closed"
+    breaker.before_request()
+
+
+def test_half_open_probe_failure_reopens_the_circuit():
+    breaker = CyberFlood.CircuitBreaker(failure_threshold=5, reset_timeout=60)
+    for _ in range(5):
+        breaker.record_failure("HTTP 502")
+    expire(breaker)
+
+    breaker.before_request()
+    breaker.record_exception(requests.exceptions.ReadTimeout("timed out"))
+
+    assert breaker.state == "open"
+    with pytest.raises(CyberFlood.CircuitOpenError):
+        breaker.before_request()
+
+
+def test_interrupted_probes_are_released():
+    breaker = CyberFlood.CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure("HTTP 500")
+    expire(breaker)
+
+    breaker.before_request()
+    breaker.record_exception(KeyboardInterrupt())
+
+    assert breaker.state == "half_open"
+    breaker.before_request()
+
+
+def test_timeouts_trip_the_breaker(mock, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    breaker = CyberFlood.CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    cf = CyberFlood.CyberFlood("user", "password", mock.address, use_yaml_cache=False, log_to_file=False,
+                               circuit_breaker=breaker, timeout=0.2)
+    assert breaker.state == "closed"
+
+    # The controller stops responding in time.
+    mock.latency = 1
+
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.Timeout):
+            cf.perform("listTests")
+    assert breaker.state == "open"
+
+    with pytest.raises(CyberFlood.CircuitOpenError):
+        cf.perform("listTests")
+    assert cf.health()["state"] == "open"
@@ -0,0 +1,78 @@
+import json
+import types
+
+import pytest
+
+import CyberFlood
+
+
+DOCUMENT = {"id": "r1",
+            "status": "completed",
+            "raw": {"Summary": {"Average CPS": 12.5, "Test Name": "Matt \"quoted\" Test ü€", "Passed": True},
+                    "Connections": {"Successful": [[0, 0], [4, 3241], [8, None]]},
+                    "Empty": {},
+                    "Score": -1.5e3},
+            "updatedAt": "2020-08-05T18:50:57.972Z"}
+
+PATHS = [("raw", "Summary"), ("raw", "Connections"), ("raw", "Empty"), ("raw", "Score")]
+
+
+def scan(chunks, path):
+    scanner = CyberFlood._JsonPathScanner(path)
+    for chunk in chunks:
+        if scanner.feed(chunk):
+            break
+
+    return scanner.value
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_every_chunk_boundary(path):
+    text = json.dumps(DOCUMENT, ensure_ascii=False)
+    expected = DOCUMENT[path[0]][path[1]]
+
+    for split in range(1, len(text)):
+        assert scan([text[:split], text[split:]], path) == expected, split
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_single_character_chunks(path):
+    text = json.dumps(DOCUMENT, indent=2)
+
+    assert scan(list(text), path) == DOCUMENT[path[0]][path[1]]
+
+
+def test_missing_section():
+    text = json.dumps(DOCUMENT)
+
+    assert scan([text], ("raw", "Nope")) is CyberFlood._JsonPathScanner.missing
+    assert scan([text[:10], text[10:]], ("raw", "Nope")) is CyberFlood._JsonPathScanner.missing
+
+
+class _StreamingResponse:
+    def __init__(self, content, chunk_size):
+        self.content = content
+        self.size = chunk_size
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), self.size):
+            yield self.content[i:i + self.size]
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_section_splits_multibyte_characters():
+    # The response has no charset, so the chunks are bytes. Some chunks end in the middle of a character.
+    content = json.dumps(DOCUMENT, ensure_ascii=False).encode("utf-8")
+    command = types.SimpleNamespace(httpverb="get", query_parameters=[], resolve_path=lambda kwargs: "/results/r1")
+
+    for chunk_size in (1, 2, 3, 5, 7):
+        response = _StreamingResponse(content, chunk_size)
+        cf = types.SimpleNamespace(result_cache=None, _stream=lambda path: response)
+
+        result = CyberFlood.LazyTestRunResult(cf, command)
+
+        assert result.raw["Summary"] == DOCUMENT["raw"]["Summary"]
+        assert response.closed
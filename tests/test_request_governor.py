@@ -0,0 +1,83 @@
+import threading
+import time
+
+import CyberFlood
+
+
+def test_max_in_flight():
+    governor = CyberFlood.RequestGovernor(max_in_flight=2)
+    lock = threading.Lock()
+    release = threading.Event()
+    in_flight = [0]
+    peak = [0]
+
+    def request():
+        with governor.slot("Tests"):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            release.wait(5)
+            with lock:
+                in_flight[0] -= 1
+
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+
+    # Give every thread a chance to try to get a slot before releasing them.
+    time.sleep(0.2)
+    assert peak[0] == 2
+    release.set()
+
+    for thread in threads:
+        thread.join(5)
+
+    stats = governor.snapshot()["Tests"]
+    assert stats["requests"] == 6
+    assert stats["in_flight"] == 0
+    assert stats["max_throttled_seconds"] > 0
+
+
+def test_tag_limits_apply_with_the_controller_limits():
+    governor = CyberFlood.RequestGovernor(max_in_flight=4)
+    governor.set_limit(max_in_flight=1, tag="Tests")
+    acquired = threading.Event()
+
+    def request():
+        with governor.slot("Tests"):
+            acquired.set()
+
+    with governor.slot("Tests"):
+        thread = threading.Thread(target=request)
+        thread.start()
+
+        # The Tests limit is reached, but other tags can still use the controller's remaining slots.
+        assert not acquired.wait(0.2)
+        with governor.slot("Subnets") as waited:
+            assert waited < 0.1
+
+    thread.join(5)
+    assert acquired.is_set()
+
+
+def test_rate_limit():
+    governor = CyberFlood.RequestGovernor(rate=50, burst=1)
+
+    start = time.perf_counter()
+    for _ in range(6):
+        with governor.slot():
+            pass
+
+    # The first request uses the burst token; each of the other 5 waits about 1/50 seconds.
+    assert time.perf_counter() - start >= 0.08
+    assert governor.snapshot()[""]["throttled_seconds"] > 0
+
+
+def test_set_limit_removes_limits():
+    governor = CyberFlood.RequestGovernor(rate=10, max_in_flight=2)
+    governor.set_limit(rate=1, tag="Tests")
+    assert governor.limits() == {None: {"rate": 10, "burst": None, "max_in_flight": 2},
+                                 "Tests": {"rate": 1, "burst": None, "max_in_flight": None}}
+
+    governor.set_limit(tag="Tests")
+    assert list(governor.limits()) == [None]
@@ -0,0 +1,65 @@
+import gzip
+import os
+
+import pytest
+
+import CyberFlood
+
+
+@pytest.mark.parametrize("status", ["completed", "Stopped", "failed", "aborted"])
+def test_final_statuses_are_cached(tmp_path, status):
+    cache = CyberFlood.ResultCache(str(tmp_path), "10.0.0.1")
+    result = {"id": "r1", "status": status}
+
+    cache.put("r1", result)
+
+    assert cache.get("r1") == result
+
+
+@pytest.mark.parametrize("status", ["waiting", "running", "stopping", "exporting", "unknown"])
+def test_other_statuses_are_not_cached(tmp_path, status):
+    cache = CyberFlood.ResultCache(str(tmp_path), "10.0.0.1")
+
+    cache.put("r1", {"id": "r1", "status": status})
+
+    assert cache.get("r1") is None
+
+
+def test_results_without_a_status_use_the_finish_time(tmp_path):
+    cache = CyberFlood.ResultCache(str(tmp_path), "10.0.0.1")
+
+    cache.put("r1", {"id": "r1", "raw": {"Summary": {"Finished At": "2020-01-01 00:00:00"}}})
+    cache.put("r2", {"id": "r2", "raw": {"Summary": {}}})
+
+    assert cache.get("r1") is not None
+    assert cache.get("r2") is None
+
+
+def test_lists_are_only_cached_when_every_result_is_final(tmp_path):
+    cache = CyberFlood.ResultCache(str(tmp_path), "10.0.0.1")
+
+    cache.put_list("run1", [{"id": "r1", "status": "completed"}, {"id": "r2", "status": "running"}])
+    assert cache.get_list("run1") is None
+    assert cache.get("r1") is None
+
+    results = [{"id": "r1", "status": "completed"}, {"id": "r2", "status": "failed"}]
+    cache.put_list("run1", results)
+    assert cache.get_list("run1") == results
+    assert cache.get("r2") == results[1]
+
+
+def test_entries_are_separate_per_controller(tmp_path):
+    CyberFlood.ResultCache(str(tmp_path), "10.0.0.1").put("r1", {"id": "r1", "status": "completed"})
+
+    assert CyberFlood.ResultCache(str(tmp_path), "10.0.0.2").get("r1") is None
+
+
+def test_corrupt_entries_are_ignored(tmp_path):
+    cache = CyberFlood.ResultCache(str(tmp_path), "10.0.0.1")
+    cache.put("r1", {"id": "r1", "status": "completed"})
+
+    for filename in os.listdir(str(tmp_path)):
+        with gzip.open(os.path.join(str(tmp_path), filename), "wb") as f:
+            f.write(b"{not json")
+
+    assert cache.get("r1") is None